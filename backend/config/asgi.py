@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_asgi_application()
+
+# Imported after the app registry is ready (get_*_application() sets it up)
+from config.startup import prepare  # noqa: E402
+
+prepare()
@@ -0,0 +1,163 @@
+"""
+Response compression negotiated from Accept-Encoding.
+
+Like Django's GZipMiddleware, but also speaks brotli and zstd when the
+optional `brotli` / `zstandard` packages are installed, skips bodies below
+COMPRESSION_MIN_SIZE, and compresses streaming responses chunk by chunk.
+The optional packages are only imported when their encoder is first used,
+so they don't add to worker boot time.
+"""
+import re
+import zlib
+from importlib.util import find_spec
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+
+class GzipEncoder:
+    def __init__(self):
+        # wbits=31 writes a gzip header rather than a raw zlib stream
+        self._compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        """Emit everything buffered so far without ending the stream"""
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class BrotliEncoder:
+    def __init__(self):
+        import brotli
+
+        self._compressor = brotli.Compressor(quality=5)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class ZstdEncoder:
+    def __init__(self):
+        import zstandard
+
+        self._compressor = zstandard.ZstdCompressor(level=3).compressobj()
+        self._flush_block = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(self._flush_block)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+# Server preference, best first, for encodings the client rates equally
+ENCODERS = {}
+if find_spec('zstandard') is not None:
+    ENCODERS['zstd'] = ZstdEncoder
+if find_spec('brotli') is not None:
+    ENCODERS['br'] = BrotliEncoder
+ENCODERS['gzip'] = GzipEncoder
+
+COMPRESSIBLE_TYPE_RE = re.compile(r'^(text/|application/([\w.+-]+\+)?json|application/javascript)')
+
+
+def choose_encoding(accept_encoding, available=ENCODERS):
+    """Pick the best encoding allowed by an Accept-Encoding header, or None"""
+    weights = {}
+    for item in accept_encoding.split(','):
+        name, _, params = item.strip().partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        match = re.search(r'q\s*=\s*([0-9.]+)', params)
+        if match:
+            try:
+                q = float(match.group(1))
+            except ValueError:
+                q = 0.0
+        weights[name] = q
+
+    best, best_q = None, 0.0
+    for name in available:
+        q = weights.get(name, weights.get('*', 0.0))
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+class CompressionMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        return self.process_response(request, response)
+
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding') or response.status_code == 304:
+            return response
+        if not COMPRESSIBLE_TYPE_RE.match(response.get('Content-Type', '')):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = self._compress_async(
+                    response.streaming_content, ENCODERS[encoding]())
+            else:
+                response.streaming_content = self._compress_stream(
+                    response.streaming_content, ENCODERS[encoding]())
+            del response.headers['Content-Length']
+        else:
+            if len(response.content) < settings.COMPRESSION_MIN_SIZE:
+                return response
+            encoder = ENCODERS[encoding]()
+            compressed = encoder.compress(response.content) + encoder.finish()
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        # The body bytes changed, so a strong validator no longer applies
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    @staticmethod
+    def _compress_stream(chunks, encoder):
+        for chunk in chunks:
+            # Flush per chunk so clients can start parsing before the stream ends
+            data = encoder.compress(chunk) + encoder.flush()
+            if data:
+                yield data
+        yield encoder.finish()
+
+    @staticmethod
+    async def _compress_async(chunks, encoder):
+        async for chunk in chunks:
+            data = encoder.compress(chunk) + encoder.flush()
+            if data:
+                yield data
+        yield encoder.finish()
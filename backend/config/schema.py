@@ -0,0 +1,197 @@
+"""
+OpenAPI schema with performance metadata.
+
+GET /api/schema/ serves the schema DRF generates for every API view. It is
+rendered once per process and then served from memory with an ETag and
+Cache-Control, so clients and load generators can poll it cheaply.
+
+Every operation carries an `x-performance` object:
+
+- pagination: the paginator type ('page' or 'cursor'), page_size,
+  max_page_size and the page size query parameter, or null when the
+  response is not paginated.
+- query_budget: the most database queries one request should make, as
+  declared by the view; null if the view declares none.
+- throttles: the rate limits that apply, as {scope, rate}.
+- cacheable: whether the server can answer from a pre-rendered cache
+  instead of querying (the feed's snapshots, when FEED_SNAPSHOT_ENABLED).
+
+The ?fields= / ?omit= / ?description_length= parameters of views with
+`selectable_fields` and ?format= for views with several renderers are
+documented from the view. Views declare what can't be introspected by
+setting `schema = PerformanceSchema(query_budget=..., parameters=...,
+examples=...)`. Examples become standard OpenAPI examples: query
+parameters for GET and DELETE, the JSON request body otherwise. A list of
+query examples becomes named examples, one request each.
+`manage.py replay_schema_examples` replays them as a smoke benchmark and
+checks the query budgets.
+"""
+import hashlib
+import json
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import require_safe
+from rest_framework.pagination import CursorPagination, LimitOffsetPagination, PageNumberPagination
+from rest_framework.schemas.openapi import AutoSchema, SchemaGenerator
+from rest_framework.schemas.utils import is_list_view
+from rest_framework.settings import api_settings
+
+# Credentials of the account the examples log in as; the replay tool creates it
+EXAMPLE_USERNAME = 'example'
+EXAMPLE_PASSWORD = 'example-password'
+
+PAGINATION_TYPES = [
+    (CursorPagination, 'cursor'),
+    (LimitOffsetPagination, 'limit_offset'),
+    (PageNumberPagination, 'page'),
+]
+
+_rendered = None
+
+
+class PerformanceSchema(AutoSchema):
+    def __init__(self, query_budget=None, cacheable=False, parameters=None, examples=None, **kwargs):
+        """
+        query_budget: an int, or {method: int} when methods differ.
+        cacheable: a bool, or the name of the boolean setting that enables the cache.
+        parameters: {name: {'description': ..., 'schema': ...}}, query
+        parameters the view reads itself.
+        examples: {method: {name: value}}, query parameters for GET and
+        DELETE and the request body for the other methods. For GET and
+        DELETE a list of those gives several examples.
+        """
+        super().__init__(**kwargs)
+        self.query_budget = query_budget
+        self.cacheable = cacheable
+        self.parameters = parameters or {}
+        self.examples = examples or {}
+
+    def get_operation(self, path, method):
+        operation = super().get_operation(path, method)
+        if method == 'GET':
+            operation['parameters'] = operation['parameters'] + self.get_query_parameters()
+        example = self.examples.get(method)
+        if example is not None:
+            if method in ('GET', 'DELETE'):
+                operation['parameters'] = self._with_query_examples(operation['parameters'], example)
+            elif 'requestBody' in operation:
+                for content in operation['requestBody']['content'].values():
+                    content['example'] = example
+            else:
+                operation['requestBody'] = {'content': {'application/json': {'example': example}}}
+        operation['x-performance'] = self.get_performance(path, method)
+        return operation
+
+    def get_query_parameters(self):
+        parameters = [{'name': name, 'in': 'query', 'required': False, **spec}
+                      for name, spec in self.parameters.items()]
+        fields = list(getattr(self.view, 'selectable_fields', ()))
+        if fields:
+            names = ', '.join(fields)
+            parameters += [
+                {'name': 'fields', 'in': 'query', 'required': False, 'schema': {'type': 'string'},
+                 'description': f'Comma-separated fields to return; id is always included. One of: {names}'},
+                {'name': 'omit', 'in': 'query', 'required': False, 'schema': {'type': 'string'},
+                 'description': f'Comma-separated fields to leave out. One of: {names}'},
+            ]
+            if 'description' in fields:
+                parameters.append({'name': 'description_length', 'in': 'query', 'required': False,
+                                   'schema': {'type': 'integer', 'minimum': 1},
+                                   'description': 'Truncate descriptions to this many characters'})
+        formats = [renderer.format for renderer in self.view.renderer_classes]
+        if len(formats) > 1:
+            parameters.append({'name': api_settings.URL_FORMAT_OVERRIDE, 'in': 'query', 'required': False,
+                               'schema': {'type': 'string', 'enum': formats}, 'description': 'Response format'})
+        return parameters
+
+    def get_operation_id(self, path, method):
+        # The feature routes are mounted twice; the board-scoped copies need their own ids
+        operation_id = super().get_operation_id(path, method)
+        return operation_id + 'ForBoard' if '{board}' in path else operation_id
+
+    def get_performance(self, path, method):
+        budget = self.query_budget
+        if isinstance(budget, dict):
+            budget = budget.get(method)
+        return {
+            'pagination': self.get_pagination(path, method),
+            'query_budget': budget,
+            'throttles': self.get_throttles(),
+            'cacheable': self.is_cacheable() and method == 'GET',
+        }
+
+    def is_cacheable(self):
+        if isinstance(self.cacheable, str):
+            return bool(getattr(settings, self.cacheable))
+        return self.cacheable
+
+    def get_throttles(self):
+        rates = api_settings.DEFAULT_THROTTLE_RATES
+        scopes = [getattr(throttle, 'scope', None) for throttle in self.view.get_throttles()]
+        return [{'scope': scope, 'rate': rates[scope]} for scope in scopes if rates.get(scope)]
+
+    def get_pagination(self, path, method):
+        paginator = self.get_paginator()
+        if paginator is None or not is_list_view(path, method, self.view):
+            return None
+        kind = next((name for cls, name in PAGINATION_TYPES if isinstance(paginator, cls)), 'custom')
+        return {
+            'type': kind,
+            'page_size': getattr(paginator, 'page_size', None) or getattr(paginator, 'default_limit', None),
+            'max_page_size': getattr(paginator, 'max_page_size', None) or getattr(paginator, 'max_limit', None),
+            'page_size_param': (getattr(paginator, 'page_size_query_param', None)
+                                or getattr(paginator, 'limit_query_param', None)),
+        }
+
+    @staticmethod
+    def _with_query_examples(parameters, examples):
+        parameters = [dict(parameter) for parameter in parameters]
+        documented = {parameter['name']: parameter for parameter in parameters if parameter['in'] == 'query'}
+        for example in examples if isinstance(examples, list) else [examples]:
+            for name, value in example.items():
+                if name not in documented:
+                    documented[name] = {'name': name, 'in': 'query', 'required': False, 'schema': {'type': 'string'}}
+                    parameters.append(documented[name])
+                if isinstance(examples, list):
+                    # Named by the example's whole query string, so the parameters of one request share a name
+                    documented[name].setdefault('examples', {})[urlencode(example, safe=',')] = {'value': value}
+                else:
+                    documented[name]['example'] = value
+        return parameters
+
+
+def rendered_schema():
+    """(JSON bytes, ETag) of the schema, generated on first use and kept for the process"""
+    global _rendered
+    if _rendered is None:
+        generator = SchemaGenerator(title='Feature Voting API', version='1.0.0',
+                                    description='Generated from the API views; see x-performance per operation.')
+        body = json.dumps(generator.get_schema(public=True), separators=(',', ':')).encode()
+        _rendered = (body, '"%s"' % hashlib.sha256(body).hexdigest()[:32])
+    return _rendered
+
+
+def clear_schema_cache(**kwargs):
+    """Throttle rates and page sizes come from settings, so regenerate when they change"""
+    global _rendered
+    _rendered = None
+
+
+setting_changed.connect(clear_schema_cache)
+
+
+@require_safe
+def schema_view(request):
+    body, etag = rendered_schema()
+    # Compression turns the ETag weak, so compare without the W/ prefix
+    if etag in {tag.strip().removeprefix('W/') for tag in request.headers.get('If-None-Match', '').split(',')}:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body, content_type='application/vnd.oai.openapi+json')
+    response.headers['ETag'] = etag
+    patch_cache_control(response, public=True, max_age=settings.OPENAPI_CACHE_SECONDS)
+    return response
@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 from pathlib import Path
 from decouple import config
 from datetime import timedelta
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -48,6 +49,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
+    'config.middleware.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -88,6 +90,42 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/ref/settings/#caches
+#
+# The write throttles (features/throttling.py), the feed throttle and
+# AUTH_RATE_LIMIT_STORE='cache' count requests here, so every worker must share
+# it. Set CACHE_URL to redis://host:6379/0 (needs the redis package) or
+# memcached://host:11211 (needs pymemcache). Without it each process gets its own
+# LocMemCache, which is for development only: every worker keeps separate
+# counters, so the effective limits are the configured rates times the number of
+# workers.
+
+CACHE_URL = config('CACHE_URL', default='')
+CACHE_BACKENDS = {
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+    'rediss': 'django.core.cache.backends.redis.RedisCache',
+    'memcached': 'django.core.cache.backends.memcached.PyMemcacheCache',
+}
+if CACHE_URL:
+    cache_scheme, _, cache_address = CACHE_URL.partition('://')
+    if cache_scheme not in CACHE_BACKENDS:
+        raise ImproperlyConfigured(f'CACHE_URL scheme must be one of {", ".join(CACHE_BACKENDS)}')
+    CACHES = {
+        'default': {
+            'BACKEND': CACHE_BACKENDS[cache_scheme],
+            # The redis client takes the URL itself, memcached just host:port
+            'LOCATION': CACHE_URL if cache_scheme.startswith('redis') else cache_address,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -106,6 +144,74 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing
+# PASSWORD_HASHER picks the hasher for new hashes ('pbkdf2' or 'argon2'); the
+# rest stay listed so existing hashes still verify and get upgraded on login.
+PASSWORD_HASHER = config('PASSWORD_HASHER', default='pbkdf2')
+PASSWORD_PBKDF2_ITERATIONS = config('PASSWORD_PBKDF2_ITERATIONS', default=0, cast=int)  # 0 = Django default
+PASSWORD_ARGON2_TIME_COST = config('PASSWORD_ARGON2_TIME_COST', default=2, cast=int)
+PASSWORD_ARGON2_MEMORY_COST = config('PASSWORD_ARGON2_MEMORY_COST', default=102400, cast=int)  # KiB
+PASSWORD_ARGON2_PARALLELISM = config('PASSWORD_ARGON2_PARALLELISM', default=8, cast=int)
+
+_PASSWORD_HASHERS = {
+    'pbkdf2': 'users.hashers.ConfigurablePBKDF2PasswordHasher',
+    'argon2': 'users.hashers.ConfigurableArgon2PasswordHasher',
+}
+PASSWORD_HASHERS = [_PASSWORD_HASHERS[PASSWORD_HASHER]] + [
+    hasher for name, hasher in _PASSWORD_HASHERS.items() if name != PASSWORD_HASHER
+] + [
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
+# Login/registration hashing runs on a bounded pool; requests beyond
+# workers + queue depth are rejected with 503 instead of piling up.
+AUTH_HASHING_WORKERS = config('AUTH_HASHING_WORKERS', default=2, cast=int)
+AUTH_HASHING_QUEUE_DEPTH = config('AUTH_HASHING_QUEUE_DEPTH', default=16, cast=int)
+AUTH_HASHING_TIMEOUT = config('AUTH_HASHING_TIMEOUT', default=10, cast=float)  # seconds
+
+# Auth rate limit bucket storage: 'memory' (per worker) or 'cache' (shared through CACHE_URL)
+AUTH_RATE_LIMIT_STORE = config('AUTH_RATE_LIMIT_STORE', default='memory')
+
+# Response compression (gzip always; brotli/zstd when their packages are installed)
+COMPRESSION_MIN_SIZE = config('COMPRESSION_MIN_SIZE', default=512, cast=int)  # bytes
+
+# Pre-rendered feed pages (see features/snapshots.py and `manage.py build_feed_snapshots`)
+FEED_SNAPSHOT_ENABLED = config('FEED_SNAPSHOT_ENABLED', default=False, cast=bool)
+FEED_SNAPSHOT_PAGES = config('FEED_SNAPSHOT_PAGES', default=5, cast=int)
+# Seconds a dirty snapshot keeps being served while it waits for a rebuild; clean ones never expire
+FEED_SNAPSHOT_MAX_AGE = config('FEED_SNAPSHOT_MAX_AGE', default=30, cast=int)
+
+# Delta sync (GET /api/sync/)
+SYNC_MAX_CHANGES = config('SYNC_MAX_CHANGES', default=500, cast=int)  # log entries per response
+SYNC_LOG_RETENTION_DAYS = config('SYNC_LOG_RETENTION_DAYS', default=30, cast=int)
+# Seconds behind each token that are re-read, for log entries that commit out of id order
+SYNC_OVERLAP_SECONDS = config('SYNC_OVERLAP_SECONDS', default=5, cast=int)
+
+# Webhook delivery (see features/webhooks.py and `manage.py dispatch_webhooks`)
+WEBHOOK_BATCH_SIZE = config('WEBHOOK_BATCH_SIZE', default=500, cast=int)  # outbox events / deliveries per pass
+WEBHOOK_CONCURRENCY = config('WEBHOOK_CONCURRENCY', default=8, cast=int)  # requests in flight
+WEBHOOK_TIMEOUT = config('WEBHOOK_TIMEOUT', default=5, cast=float)  # seconds
+WEBHOOK_MAX_ATTEMPTS = config('WEBHOOK_MAX_ATTEMPTS', default=8, cast=int)
+WEBHOOK_BACKOFF_BASE = config('WEBHOOK_BACKOFF_BASE', default=10, cast=float)  # seconds, doubled per attempt
+WEBHOOK_BACKOFF_MAX = config('WEBHOOK_BACKOFF_MAX', default=3600, cast=float)
+WEBHOOK_CIRCUIT_THRESHOLD = config('WEBHOOK_CIRCUIT_THRESHOLD', default=5, cast=int)  # straight failures
+WEBHOOK_CIRCUIT_COOLDOWN = config('WEBHOOK_CIRCUIT_COOLDOWN', default=300, cast=float)  # seconds
+WEBHOOK_SUMMARY_WINDOW = config('WEBHOOK_SUMMARY_WINDOW', default=60, cast=float)  # seconds votes fold into one summary
+
+# Vote anomaly detection (see features/abuse.py and `manage.py analyze_votes`)
+ABUSE_WINDOW = config('ABUSE_WINDOW', default=300, cast=int)  # seconds of history in each sketch
+ABUSE_BUCKETS = config('ABUSE_BUCKETS', default=6, cast=int)  # slots the window slides in
+ABUSE_FEATURE_BURST = config('ABUSE_FEATURE_BURST', default=50, cast=int)  # votes on a feature before it is examined
+ABUSE_ACCOUNT_BURST = config('ABUSE_ACCOUNT_BURST', default=30, cast=int)  # votes by one account
+ABUSE_NEW_ACCOUNT_AGE = config('ABUSE_NEW_ACCOUNT_AGE', default=86400, cast=int)  # seconds
+ABUSE_NEW_ACCOUNT_RATIO = config('ABUSE_NEW_ACCOUNT_RATIO', default=0.6, cast=float)
+ABUSE_MIN_SOURCE_RATIO = config('ABUSE_MIN_SOURCE_RATIO', default=0.2, cast=float)  # distinct IPs (or agents) per vote
+ABUSE_EXCLUDE_FLAGGED = config('ABUSE_EXCLUDE_FLAGGED', default=False, cast=bool)
+
+# OpenAPI schema (GET /api/schema/, see config/schema.py)
+OPENAPI_CACHE_SECONDS = config('OPENAPI_CACHE_SECONDS', default=300, cast=int)  # Cache-Control max-age
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
@@ -141,7 +247,17 @@ REST_FRAMEWORK = {
         'rest_framework.renderers.JSONRenderer',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
-    'PAGE_SIZE': 20
+    'PAGE_SIZE': 20,
+    'DEFAULT_SCHEMA_CLASS': 'config.schema.PerformanceSchema',
+    'DEFAULT_THROTTLE_RATES': {
+        'login_ip': config('THROTTLE_LOGIN_IP', default='30/min'),
+        'login_username': config('THROTTLE_LOGIN_USERNAME', default='10/min'),
+        'register_ip': config('THROTTLE_REGISTER_IP', default='10/hour'),
+        'vote': config('THROTTLE_VOTE', default='60/min'),
+        'feature_create': config('THROTTLE_FEATURE_CREATE', default='20/hour'),
+        'write_ip': config('THROTTLE_WRITE_IP', default='300/min'),
+        'feed_anon': config('THROTTLE_FEED_ANON', default='120/min'),
+    },
 }
 
 # JWT Configuration
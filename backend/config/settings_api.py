@@ -0,0 +1,31 @@
+"""
+Settings for API-only workers.
+
+The API is JSON over JWT, so it never uses the admin, sessions, messages,
+static files, templates or CSRF. Leaving them out makes worker boot faster
+and removes that middleware from every request. Run the admin (and
+collectstatic) from a separate process on config.settings.
+
+Select with DJANGO_SETTINGS_MODULE=config.settings_api. gunicorn.conf.py
+uses it by default.
+"""
+from .settings import *  # noqa: F401,F403
+
+INSTALLED_APPS = [
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'rest_framework',
+    'rest_framework_simplejwt',
+    'corsheaders',
+    'users',
+    'features',
+]
+
+MIDDLEWARE = [
+    'corsheaders.middleware.CorsMiddleware',
+    'config.middleware.CompressionMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'django.middleware.common.CommonMiddleware',
+]
+
+TEMPLATES = []
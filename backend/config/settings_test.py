@@ -0,0 +1,39 @@
+"""
+Settings for the test suite.
+
+`manage.py test` selects this module automatically (see manage.py). Tests
+that exercise real hashers or throttle rates override those settings
+themselves.
+"""
+from .settings import *  # noqa: F401,F403
+
+# A single MD5 round instead of ~1M PBKDF2 iterations per create_user()
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+# Django runs SQLite test databases in memory (and clones them per process
+# with --parallel). Migrations stay enabled: 0005 creates the default board.
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    }
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Large enough that ordinary tests never trip a throttle
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,  # noqa: F405
+    'DEFAULT_THROTTLE_RATES': {scope: '100000/min' for scope in REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']},  # noqa: F405
+}
+
+FEED_SNAPSHOT_ENABLED = False
+
+# Tests write their sync changes within seconds of each other; SyncTest
+# enables the overlap where it is under test
+SYNC_OVERLAP_SECONDS = 0
+DEBUG = False
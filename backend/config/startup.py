@@ -0,0 +1,49 @@
+"""
+Worker boot: warm-up and fork safety.
+
+config/wsgi.py and config/asgi.py call prepare() once the application
+object exists. It imports the URLconf and with it every view, serializer
+and throttle, so that cost is paid at boot rather than by the first
+request. With `gunicorn --preload` (see gunicorn.conf.py) it is paid once
+in the master and shared copy-on-write by every forked worker.
+
+A preloaded master must not hand open resources to its children, so
+prepare() also registers fork hooks. Before each fork they close the
+parent's database connections, so no socket is shared between processes.
+After the fork, the child drops the auth hashing pool, whose threads only
+exist in the parent.
+"""
+import os
+
+from django.db import connections
+from django.urls import get_resolver
+
+from users.hashing import forget_hashing_pool
+
+_fork_hooks_installed = False
+
+
+def prepare():
+    warm_up()
+    install_fork_hooks()
+
+
+def warm_up():
+    """Import every view now instead of on the first request"""
+    get_resolver().url_patterns
+    close_connections()
+
+
+def install_fork_hooks():
+    global _fork_hooks_installed
+    if _fork_hooks_installed or not hasattr(os, 'register_at_fork'):
+        return
+    os.register_at_fork(before=close_connections, after_in_child=forget_hashing_pool)
+    _fork_hooks_installed = True
+
+
+def close_connections():
+    """Close this thread's open database connections, leaving any mid-transaction alone"""
+    for connection in connections.all(initialized_only=True):
+        if not connection.in_atomic_block:
+            connection.close()
@@ -14,11 +14,21 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from django.contrib import admin
+from django.apps import apps
 from django.urls import path, include
 
+from .schema import schema_view
+
 urlpatterns = [
-    path('admin/', admin.site.urls),
+    path('api/schema/', schema_view, name='openapi-schema'),
     path('api/auth/', include('users.urls')),
     path('api/', include('features.urls')),
+    # The same feature routes scoped to one board; the unprefixed ones serve the default board
+    path('api/boards/<slug:board>/', include(('features.urls', 'features'), namespace='board')),
 ]
+
+# config.settings_api leaves the admin out
+if apps.is_installed('django.contrib.admin'):
+    from django.contrib import admin
+
+    urlpatterns.insert(0, path('admin/', admin.site.urls))
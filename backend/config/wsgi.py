@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_wsgi_application()
+
+# Imported after the app registry is ready (get_*_application() sets it up)
+from config.startup import prepare  # noqa: E402
+
+prepare()
@@ -4,3 +4,18 @@ from django.apps import AppConfig
 class FeaturesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'features'
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save
+        from .models import Feature, Vote
+        from .snapshots import mark_dirty
+        from .sync import record_feature_change, record_vote_change
+
+        for model in (Feature, Vote):
+            post_save.connect(mark_dirty, sender=model, dispatch_uid=f'feed-snapshot-dirty-save-{model.__name__}')
+            post_delete.connect(mark_dirty, sender=model, dispatch_uid=f'feed-snapshot-dirty-delete-{model.__name__}')
+
+        post_save.connect(record_feature_change, sender=Feature, dispatch_uid='sync-feature-save')
+        post_delete.connect(record_feature_change, sender=Feature, dispatch_uid='sync-feature-delete')
+        post_save.connect(record_vote_change, sender=Vote, dispatch_uid='sync-vote-save')
+        post_delete.connect(record_vote_change, sender=Vote, dispatch_uid='sync-vote-delete')
@@ -0,0 +1,60 @@
+"""
+Moving long-deleted features out of the hot tables.
+
+Soft-deleted features and their votes are copied into ArchivedFeature /
+ArchivedVote and removed from Feature / Vote in small batches, each in its
+own short transaction, so no lock is held for long. Every step is
+idempotent: an interrupted run is finished by the next one.
+
+Votes are removed with a raw DELETE that skips the per-row signals: the
+feature's own delete already records one sync log entry and marks the
+snapshots dirty, so a log entry per archived vote would only bloat the log.
+"""
+from django.db import transaction
+
+from .models import ArchivedFeature, ArchivedVote, Feature, FlaggedVote, Vote
+
+
+def archive_deleted_features(deleted_before, batch_size=500):
+    """Archive features soft-deleted before `deleted_before`; return (features, votes) moved"""
+    features_moved = votes_moved = 0
+
+    while True:
+        batch = list(
+            Feature.all_objects
+            .filter(status='deleted', deleted_at__lt=deleted_before)
+            .order_by('deleted_at')
+            .values('id', 'board_id', 'title', 'description', 'author_id', 'created_at', 'updated_at', 'deleted_at')
+            [:batch_size]
+        )
+        if not batch:
+            return features_moved, votes_moved
+
+        feature_ids = [row['id'] for row in batch]
+        ArchivedFeature.objects.bulk_create(
+            [ArchivedFeature(**row) for row in batch], ignore_conflicts=True
+        )
+        votes_moved += _move_votes(feature_ids, batch_size)
+
+        with transaction.atomic():
+            features_moved += Feature.all_objects.filter(pk__in=feature_ids).delete()[1].get('features.Feature', 0)
+
+
+def _move_votes(feature_ids, batch_size):
+    moved = 0
+    while True:
+        with transaction.atomic():
+            votes = list(
+                Vote.objects.filter(feature_id__in=feature_ids)
+                .values('id', 'user_id', 'feature_id', 'vote_type', 'created_at', 'updated_at')
+                [:batch_size]
+            )
+            if not votes:
+                return moved
+            ArchivedVote.objects.bulk_create([ArchivedVote(**row) for row in votes], ignore_conflicts=True)
+            vote_ids = [row['id'] for row in votes]
+            # The raw delete doesn't cascade, so clear the abuse flags first
+            FlaggedVote.objects.filter(vote_id__in=vote_ids).delete()
+            queryset = Vote.objects.filter(pk__in=vote_ids)
+            queryset._raw_delete(queryset.db)
+        moved += len(votes)
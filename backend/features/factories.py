@@ -0,0 +1,54 @@
+"""
+Bulk fixture builders for tests and benchmarks.
+
+Everything is written with bulk_create, so a graph of thousands of rows
+costs a handful of INSERTs. That also means Vote.save() and the post_save
+receivers don't run: votes get their board set here, and no FeatureChange
+or snapshot bookkeeping is recorded for factory rows.
+"""
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+
+from .models import Feature, Vote, get_default_board_id
+
+
+def create_users(count, prefix='user', password='pass123'):
+    """`count` users sharing one precomputed password hash"""
+    hashed = make_password(password)
+    return User.objects.bulk_create(
+        [User(username=f'{prefix}{i}', password=hashed) for i in range(count)]
+    )
+
+
+def create_features(count, author, board=None, description='Description', prefix='Feature'):
+    board_id = board.pk if board is not None else get_default_board_id()
+    return Feature.objects.bulk_create([
+        Feature(title=f'{prefix} {i}', description=description, author=author, board_id=board_id)
+        for i in range(count)
+    ], batch_size=500)
+
+
+def create_votes(users, features, votes_per_feature, upvote_ratio=0.7, seed=0):
+    """
+    Up to `votes_per_feature` votes on each feature from distinct random
+    users, so (user, feature) stays unique. Seeded, so runs are repeatable.
+    """
+    rng = random.Random(seed)
+    votes_per_feature = min(votes_per_feature, len(users))
+    votes = [
+        Vote(user=user, feature=feature, board_id=feature.board_id,
+             vote_type=Vote.UPVOTE if rng.random() < upvote_ratio else Vote.DOWNVOTE)
+        for feature in features
+        for user in rng.sample(users, votes_per_feature)
+    ]
+    return Vote.objects.bulk_create(votes, batch_size=1000)
+
+
+def create_vote_graph(users=50, features=200, votes_per_feature=10, board=None, seed=0):
+    """Users, features authored by the first user, and random votes between them"""
+    user_rows = create_users(users)
+    feature_rows = create_features(features, user_rows[0], board=board)
+    vote_rows = create_votes(user_rows, feature_rows, votes_per_feature, seed=seed)
+    return user_rows, feature_rows, vote_rows
@@ -0,0 +1,65 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from features.abuse import VoteAnalyzer, analyze, vote_events
+from features.models import FlaggedVote, Vote
+
+# Votes get created_at from the web workers' clocks and commit out of order,
+# so each poll re-reads this far behind the newest vote already seen
+POLL_OVERLAP = timedelta(seconds=5)
+
+
+class Command(BaseCommand):
+    help = 'Flag scripted vote bursts by replaying stored votes through the streaming analyzer'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=float, help='Only replay votes from the last N hours (default: all)')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would be flagged without storing it')
+        parser.add_argument('--reset', action='store_true', help='Clear existing flags before replaying')
+        parser.add_argument('--loop', action='store_true', help='After the replay, keep following new votes')
+        parser.add_argument('--poll', type=float, default=2.0, help='Seconds between polls (with --loop)')
+
+    def handle(self, *args, **options):
+        if options['reset'] and not options['dry_run']:
+            deleted, _ = FlaggedVote.objects.all().delete()
+            self.stdout.write(f'Cleared {deleted} flags')
+
+        since = None
+        if options['hours'] is not None:
+            since = timezone.now() - timedelta(hours=options['hours'])
+        elif options['loop']:
+            # Following live traffic only needs the current window to start from
+            since = timezone.now() - timedelta(seconds=settings.ABUSE_WINDOW)
+        votes = Vote.objects.all() if since is None else Vote.objects.filter(created_at__gte=since)
+
+        analyzer = VoteAnalyzer()
+        started = time.perf_counter()
+        events = list(vote_events(votes)) if options['loop'] else vote_events(votes)
+        processed, reasons = analyze(events, analyzer, options['dry_run'])
+        self.report(processed, reasons, time.perf_counter() - started)
+        if not options['loop']:
+            return
+
+        watermark = events[-1].timestamp if events else timezone.now()
+        # Votes inside the overlap that were already analyzed, with their timestamps
+        seen = {event.vote_id: event.timestamp for event in events if event.timestamp >= watermark - POLL_OVERLAP}
+        while True:
+            time.sleep(options['poll'])
+            recent = vote_events(Vote.objects.filter(created_at__gte=watermark - POLL_OVERLAP))
+            fresh = [event for event in recent if event.vote_id not in seen]
+            if not fresh:
+                continue
+            processed, reasons = analyze(fresh, analyzer, options['dry_run'])
+            self.report(processed, reasons)
+            watermark = max(watermark, fresh[-1].timestamp)
+            seen.update((event.vote_id, event.timestamp) for event in fresh)
+            seen = {vote_id: ts for vote_id, ts in seen.items() if ts >= watermark - POLL_OVERLAP}
+
+    def report(self, processed, reasons, elapsed=None):
+        flagged = ', '.join(f'{reason} {count}' for reason, count in sorted(reasons.items())) or 'none'
+        rate = f' in {elapsed:.2f}s ({processed / elapsed:,.0f} votes/s)' if elapsed and processed else ''
+        self.stdout.write(f'Analyzed {processed} votes{rate}; flagged: {flagged}')
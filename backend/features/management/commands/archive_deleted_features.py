@@ -0,0 +1,20 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from features.archival import archive_deleted_features
+
+
+class Command(BaseCommand):
+    help = 'Move long soft-deleted features and their votes into the archive tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=int, default=30,
+                            help='Only archive features deleted at least this many days ago')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['older_than_days'])
+        features, votes = archive_deleted_features(cutoff, batch_size=options['batch_size'])
+        self.stdout.write(f'Archived {features} features and {votes} votes deleted before {cutoff:%Y-%m-%d}')
@@ -0,0 +1,58 @@
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from config.middleware import ENCODERS
+from features.renderers import CompactJSONRenderer
+
+
+class Command(BaseCommand):
+    help = 'Compare bytes on the wire and CPU cost per response for each list format and encoding'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=20, help='Features per page')
+        parser.add_argument('--repeat', type=int, default=200)
+
+    def handle(self, *args, **options):
+        page = {
+            'count': 1000,
+            'next': 'http://localhost:8000/api/features/?page=2',
+            'previous': None,
+            'results': [self.sample_feature(i) for i in range(options['items'])],
+        }
+        bodies = {
+            'json': JSONRenderer().render(page),
+            'compact': CompactJSONRenderer().render(page),
+        }
+
+        self.stdout.write(f"{'format':<10}{'encoding':<10}{'bytes':>10}{'ratio':>8}{'us/response':>14}")
+        for format_name, body in bodies.items():
+            ratio = len(body) / len(bodies['json'])
+            self.stdout.write(f"{format_name:<10}{'identity':<10}{len(body):>10}{ratio:>8.2f}{0:>14.1f}")
+            for encoding, encoder_class in ENCODERS.items():
+                start = time.perf_counter()
+                for _ in range(options['repeat']):
+                    encoder = encoder_class()
+                    compressed = encoder.compress(body) + encoder.finish()
+                per_response_us = (time.perf_counter() - start) / options['repeat'] * 1e6
+                ratio = len(compressed) / len(bodies['json'])
+                self.stdout.write(
+                    f'{format_name:<10}{encoding:<10}{len(compressed):>10}{ratio:>8.2f}{per_response_us:>14.1f}'
+                )
+        self.stdout.write('ratio is relative to uncompressed JSON')
+
+    @staticmethod
+    def sample_feature(i):
+        return {
+            'id': str(uuid.uuid4()),
+            'title': f'Feature request number {i}',
+            'description': f'Description for feature {i}. ' * 8,
+            'author': {'id': i % 7 + 1, 'username': f'user{i % 7 + 1}'},
+            'created_at': '2025-09-13T13:32:00.000000Z',
+            'upvote_count': i * 3,
+            'downvote_count': i,
+            'total_score': i * 2,
+            'user_vote': None,
+        }
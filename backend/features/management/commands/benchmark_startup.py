@@ -0,0 +1,101 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Runs in a fresh interpreter per sample, the way a worker boots: import the
+# WSGI module, then serve two requests through it in-process.
+PROBE = '''
+import json, sys, time
+from io import BytesIO
+
+start = time.perf_counter()
+from config.wsgi import application
+imported = time.perf_counter()
+
+
+def request(path):
+    environ = {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': '',
+        'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'HTTP_HOST': 'localhost',
+        'REMOTE_ADDR': '127.0.0.1', 'wsgi.url_scheme': 'http', 'wsgi.input': BytesIO(),
+        'wsgi.errors': sys.stderr, 'wsgi.version': (1, 0), 'wsgi.multithread': False,
+        'wsgi.multiprocess': True, 'wsgi.run_once': False,
+    }
+    statuses = []
+    started = time.perf_counter()
+    b''.join(application(environ, lambda status, headers, exc_info=None: statuses.append(status)))
+    return statuses[0], time.perf_counter() - started
+
+
+status, first = request(sys.argv[1])
+second_status, second = request(sys.argv[1])
+print(json.dumps({'import': imported - start, 'first': first, 'second': second,
+                  'status': status, 'second_status': second_status, 'modules': len(sys.modules)}))
+'''
+
+
+class Command(BaseCommand):
+    help = 'Measure worker boot: WSGI import time and first-request latency per settings profile'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profiles', nargs='+', default=['config.settings', 'config.settings_api'],
+                            help='Settings modules to compare')
+        parser.add_argument('--runs', type=int, default=5, help='Fresh interpreters per profile')
+        parser.add_argument('--path', default='/api/features/', help='Path for the first and second request')
+        parser.add_argument('--budget-import-ms', type=float,
+                            help='Fail if any profile takes longer than this to import the WSGI app')
+        parser.add_argument('--budget-first-request-ms', type=float,
+                            help='Fail if any profile takes longer than this to serve its first request')
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{'profile':<24}{'boot ms':>10}{'import ms':>11}{'1st req ms':>12}{'2nd req ms':>12}"
+            f"{'modules':>9}  status"
+        )
+        over_budget = []
+        errors = []
+        for profile in options['profiles']:
+            samples = [self.sample(profile, options['path']) for _ in range(options['runs'])]
+            boot, imported, first, second = (
+                statistics.median(sample[key] for sample in samples) * 1000
+                for key in ('boot', 'import', 'first', 'second')
+            )
+            self.stdout.write(
+                f"{profile:<24}{boot:>10.1f}{imported:>11.1f}{first:>12.1f}{second:>12.1f}"
+                f"{samples[0]['modules']:>9}  {samples[0]['status']}"
+            )
+            # An error page is timed like any other response, so those figures measure the wrong thing
+            statuses = {sample[key] for sample in samples for key in ('status', 'second_status')}
+            failed = sorted(status for status in statuses if not status.startswith('2'))
+            if failed:
+                errors.append(f"{profile} answered {', '.join(failed)}")
+            if options['budget_import_ms'] is not None and imported > options['budget_import_ms']:
+                over_budget.append(f'{profile} import {imported:.1f}ms')
+            if options['budget_first_request_ms'] is not None and first > options['budget_first_request_ms']:
+                over_budget.append(f'{profile} first request {first:.1f}ms')
+
+        self.stdout.write('boot includes interpreter start-up; figures are medians')
+        if errors:
+            raise CommandError(f"Requests to {options['path']} failed: " + '; '.join(errors))
+        if over_budget:
+            raise CommandError('Over budget: ' + ', '.join(over_budget))
+
+    @staticmethod
+    def sample(profile, path):
+        # ALLOWED_HOSTS is pinned so the probe's requests pass host validation
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': profile, 'ALLOWED_HOSTS': 'localhost'}
+        started = time.perf_counter()
+        result = subprocess.run([sys.executable, '-c', PROBE, path], cwd=settings.BASE_DIR, env=env,
+                                capture_output=True, text=True)
+        boot = time.perf_counter() - started
+        if result.returncode != 0:
+            raise CommandError(f'{profile} failed to start:\n{result.stderr}')
+        sample = json.loads(result.stdout.strip().splitlines()[-1])
+        sample['boot'] = boot
+        return sample
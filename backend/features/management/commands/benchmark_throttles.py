@@ -0,0 +1,67 @@
+import time
+
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from django.test.utils import override_settings
+from rest_framework.request import Request
+
+from features.throttling import (FeatureCreateRateThrottle, FeedAnonRateThrottle,
+                                 VoteRateThrottle, WriteIPRateThrottle)
+
+
+class Command(BaseCommand):
+    help = 'Measure the per-request overhead of the feature endpoint throttles'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20000)
+        parser.add_argument('--clients', type=int, default=100,
+                            help='Distinct users/IPs to spread requests over')
+        parser.add_argument('--budget-us', type=float, default=100.0,
+                            help='Fail if any throttle exceeds this many microseconds per request')
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        factory = RequestFactory()
+
+        # Unsaved users are enough: the throttles only look at pk and is_authenticated
+        users = [User(pk=i, username=f'bench{i}') for i in range(options['clients'])]
+        requests = []
+        for i, user in enumerate(users):
+            request = Request(factory.post('/api/feature/', REMOTE_ADDR=f'10.0.{i // 256}.{i % 256}'))
+            request.user = user
+            requests.append(request)
+        anon_requests = []
+        for i in range(options['clients']):
+            request = Request(factory.get('/api/features/', REMOTE_ADDR=f'10.1.{i // 256}.{i % 256}'))
+            request.user = AnonymousUser()
+            anon_requests.append(request)
+
+        unlimited = '1000000000/min'
+        rates = {scope: unlimited for scope in ('vote', 'feature_create', 'write_ip', 'feed_anon')}
+        cases = [
+            (VoteRateThrottle, requests),
+            (FeatureCreateRateThrottle, requests),
+            (WriteIPRateThrottle, requests),
+            (FeedAnonRateThrottle, anon_requests),
+        ]
+
+        over_budget = []
+        with override_settings(REST_FRAMEWORK={'DEFAULT_THROTTLE_RATES': rates}):
+            for throttle_class, reqs in cases:
+                # Separate key space so the run never touches real clients' counters
+                throttle = type(throttle_class.__name__, (throttle_class,),
+                                {'cache_format': 'benchmark:' + throttle_class.cache_format})()
+                start = time.perf_counter()
+                for i in range(iterations):
+                    throttle.allow_request(reqs[i % len(reqs)], None)
+                per_request_us = (time.perf_counter() - start) / iterations * 1e6
+
+                within = per_request_us <= options['budget_us']
+                if not within:
+                    over_budget.append(throttle_class.__name__)
+                style = self.style.SUCCESS if within else self.style.ERROR
+                self.stdout.write(style(f'{throttle_class.__name__:<28} {per_request_us:8.1f} us/request'))
+
+        if over_budget:
+            raise CommandError(f"Over the {options['budget_us']:.0f}us budget: {', '.join(over_budget)}")
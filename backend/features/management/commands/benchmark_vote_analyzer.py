@@ -0,0 +1,85 @@
+import random
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from django.core.management.base import BaseCommand, CommandError
+
+from features.abuse import VoteAnalyzer, VoteEvent
+
+AGENTS = [f'Mozilla/5.0 (Platform {n}) Browser/{100 + n}' for n in range(40)]
+# Everyone on the mobile app shares one of a few agent strings
+APP_AGENTS = [f'FeatureVoting-iOS/2.{n}' for n in range(3)]
+# Established accounts voting from behind one office proxy
+PROXY_IP = '198.51.100.1'
+
+
+class Command(BaseCommand):
+    help = 'Measure vote analyzer throughput on a synthetic stream with an injected burst'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=200000, help='Organic votes in the stream')
+        parser.add_argument('--features', type=int, default=2000)
+        parser.add_argument('--users', type=int, default=50000)
+        parser.add_argument('--rate', type=float, default=200, help='Organic votes per second of simulated time')
+        parser.add_argument('--burst', type=int, default=2000, help='Scripted votes injected on one feature')
+        parser.add_argument('--popular-share', type=float, default=0.1,
+                            help='Share of organic votes that go to one popular feature')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--budget-eps', type=float, help='Fail if throughput is below this many events/sec')
+
+    def handle(self, *args, **options):
+        events, scripted = self.stream(options)
+        analyzer = VoteAnalyzer()
+        flagged = {}
+        started = time.perf_counter()
+        for event in events:
+            for vote_id, reason in analyzer.process(event):
+                flagged[vote_id] = reason
+        elapsed = time.perf_counter() - started
+
+        eps = len(events) / elapsed
+        caught = sum(1 for vote_id in flagged if vote_id in scripted)
+        false_flags = len(flagged) - caught
+        self.stdout.write(f'{len(events):,} events in {elapsed:.2f}s: {eps:,.0f} events/s')
+        self.stdout.write(f'Scripted votes flagged: {caught:,} of {len(scripted):,}')
+        self.stdout.write(f'Organic votes flagged: {false_flags:,} of {len(events) - len(scripted):,}')
+        self.stdout.write('By reason: ' + ', '.join(
+            f'{reason} {count:,}' for reason, count in sorted(Counter(flagged.values()).items())
+        ))
+        if options['budget_eps'] is not None and eps < options['budget_eps']:
+            raise CommandError(f'Under budget: {eps:,.0f} events/s')
+
+    @staticmethod
+    def stream(options):
+        """
+        Organic votes from established accounts, with one scripted burst in the
+        middle. One popular feature gets far more than ABUSE_FEATURE_BURST
+        organic votes per window, half of them from the app's few agent
+        strings and a tenth through one proxy IP, none of which should be flagged.
+        """
+        rng = random.Random(options['seed'])
+        start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        established = start - timedelta(days=365)
+        events = []
+        for n in range(options['events']):
+            ts = start + timedelta(seconds=n / options['rate'])
+            user = rng.randrange(options['users'])
+            feature = 0 if rng.random() < options['popular_share'] else rng.randrange(options['features'])
+            ip = PROXY_IP if user % 10 == 0 else f'10.{user >> 16 & 255}.{user >> 8 & 255}.{user & 255}'
+            agent = rng.choice(APP_AGENTS) if user % 2 else rng.choice(AGENTS)
+            events.append(VoteEvent(n, feature, user, ts, established, ip, agent))
+
+        # Fresh accounts behind a handful of proxies, all on one feature within a minute
+        middle = start + timedelta(seconds=options['events'] / options['rate'] / 2)
+        scripted = set()
+        for n in range(options['burst']):
+            vote_id = options['events'] + n
+            ts = middle + timedelta(seconds=60 * n / max(options['burst'], 1))
+            events.append(VoteEvent(
+                vote_id, options['features'], options['users'] + n, ts, ts - timedelta(minutes=10),
+                f'192.0.2.{n % 5}', 'python-requests/2.31',
+            ))
+            scripted.add(vote_id)
+        events.sort(key=lambda event: event.timestamp)
+        return events, scripted
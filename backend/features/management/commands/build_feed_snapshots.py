@@ -0,0 +1,44 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from features.snapshots import boards_needing_rebuild, build_snapshots, snapshot_status
+
+
+class Command(BaseCommand):
+    help = "Pre-render the first pages of each board's feed sorts for FeatureListView to serve"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, default=settings.FEED_SNAPSHOT_PAGES)
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep running, rebuilding boards whose snapshots are dirty or missing')
+        parser.add_argument('--poll', type=float, default=1.0,
+                            help='Seconds between dirty checks (with --loop)')
+        parser.add_argument('--status', action='store_true', help='Print snapshot age and exit')
+
+    def handle(self, *args, **options):
+        if options['status']:
+            status = snapshot_status()
+            if not status:
+                self.stdout.write('No snapshots built')
+            for sort, state in status.items():
+                self.stdout.write(f"{sort}: age {state['age']:.1f}s{' (dirty)' if state['dirty'] else ''}")
+            return
+
+        if not options['loop']:
+            self.build(None, options['pages'])
+            return
+
+        # Only boards that changed (or have no snapshots yet) are rebuilt on each pass
+        while True:
+            board_ids = boards_needing_rebuild()
+            if board_ids:
+                self.build(board_ids, options['pages'])
+            time.sleep(options['poll'])
+
+    def build(self, board_ids, pages):
+        start = time.perf_counter()
+        count = build_snapshots(board_ids, pages)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.stdout.write(f'Built {count} snapshot pages in {elapsed_ms:.0f}ms')
@@ -0,0 +1,30 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from features.webhooks import dispatch
+
+
+class Command(BaseCommand):
+    help = 'Turn outbox events into webhook deliveries and send the ones that are due'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.WEBHOOK_BATCH_SIZE,
+                            help='Outbox events planned per pass')
+        parser.add_argument('--concurrency', type=int, default=settings.WEBHOOK_CONCURRENCY,
+                            help='Webhook requests in flight at once')
+        parser.add_argument('--loop', action='store_true', help='Keep running')
+        parser.add_argument('--poll', type=float, default=1.0,
+                            help='Seconds to sleep when a pass finds nothing to do (with --loop)')
+
+    def handle(self, *args, **options):
+        while True:
+            events, sent, failed = dispatch(options['batch_size'], options['concurrency'])
+            if events or sent or failed:
+                self.stdout.write(f'Planned {events} events, delivered {sent}, failed {failed}')
+            if not options['loop']:
+                return
+            # Go straight round again while there is a backlog
+            if events < options['batch_size'] and not (sent or failed):
+                time.sleep(options['poll'])
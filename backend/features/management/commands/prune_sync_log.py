@@ -0,0 +1,15 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from features.sync import prune_changes
+
+
+class Command(BaseCommand):
+    help = 'Delete delta sync log entries past retention; clients with older tokens get a reset'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.SYNC_LOG_RETENTION_DAYS)
+
+    def handle(self, *args, **options):
+        deleted = prune_changes(options['days'])
+        self.stdout.write(f'Deleted {deleted} sync log entries older than {options["days"]} days')
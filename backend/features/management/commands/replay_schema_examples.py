@@ -0,0 +1,163 @@
+import json
+import statistics
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from config.schema import EXAMPLE_PASSWORD, EXAMPLE_USERNAME
+from features.factories import create_vote_graph
+from features.models import Board, Feature, FeatureChange, Vote, get_default_board_id
+from features.sync import encode_token
+
+# Outside this command's transaction these would be BEGIN/COMMIT, which are not queries either
+NOT_COUNTED = ('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')
+NAME_WIDTH = 84
+
+
+class Command(BaseCommand):
+    help = ('Replay the examples in the OpenAPI schema in-process as a smoke benchmark. '
+            'Everything runs in one transaction that is rolled back, with throttles off.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5, help='Requests per operation')
+        parser.add_argument('--features', type=int, default=0,
+                            help='Build this many extra features, with votes, before replaying')
+        parser.add_argument('--boards', action='store_true',
+                            help='Also replay the board-scoped copies of the feature routes')
+        parser.add_argument('--strict', action='store_true',
+                            help='Fail on error responses or on operations over their query budget')
+
+    def handle(self, *args, **options):
+        # The test client sends Host: testserver
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            problems = self.replay_all(options)
+        if options['strict'] and problems:
+            raise CommandError('; '.join(problems))
+
+    def replay_all(self, options):
+        client = Client(raise_request_exception=False)
+        response = client.get('/api/schema/')
+        if response.status_code != 200:
+            raise CommandError(f'GET /api/schema/ returned {response.status_code}')
+        schema = json.loads(response.content)
+
+        self.stdout.write(f"{'operation':<{NAME_WIDTH}}{'status':>7}{'ms':>9}{'bytes':>9}{'queries':>9}{'budget':>8}")
+        problems = []
+        rates_off = {**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {}}
+        with transaction.atomic(), override_settings(REST_FRAMEWORK=rates_off):
+            token, values = self.fixture(options['features'])
+            for path, operations in schema['paths'].items():
+                if '{board}' in path and not options['boards']:
+                    continue
+                for method, operation in operations.items():
+                    for example, request, reason in self.build_requests(path, method, operation, values):
+                        name = f'{method.upper()} {path}' + (f' [{example}]' if example else '')
+                        if request is None:
+                            self.stdout.write(f'{name:<{NAME_WIDTH}}  skipped: {reason}')
+                            continue
+                        samples = [self.replay(client, token, *request) for _ in range(options['runs'])]
+                        problems += self.report(name, samples, operation['x-performance']['query_budget'])
+            transaction.set_rollback(True)
+        return problems
+
+    @staticmethod
+    def fixture(extra_features):
+        """
+        The example account, a feature it wrote and voted on, and values for
+        path parameters and for query parameters whose examples depend on the data
+        """
+        if extra_features:
+            create_vote_graph(users=50, features=extra_features, votes_per_feature=10)
+        user, _ = User.objects.get_or_create(username=EXAMPLE_USERNAME)
+        user.set_password(EXAMPLE_PASSWORD)
+        user.save()
+        feature = Feature.objects.create(title='Example feature', description='Used by the schema examples',
+                                         author=user, board_id=get_default_board_id())
+        Vote.objects.get_or_create(user=user, feature=feature, defaults={'vote_type': Vote.UPVOTE})
+        board = Board.objects.get(pk=get_default_board_id())
+        # A token one change behind the head, so sync has something to send
+        changes = FeatureChange.objects.filter(board=board).order_by('-id').values_list('id', flat=True)
+        since = encode_token(board.pk, changes[1] if len(changes) > 1 else 0)
+        return str(RefreshToken.for_user(user).access_token), {'id': str(feature.pk), 'board': board.slug,
+                                                               'since': since}
+
+    @staticmethod
+    def build_requests(path, method, operation, values):
+        """
+        (example name, (method, url, query, body), None) for each example, or
+        a single (None, None, reason) when the operation can't be replayed
+        """
+        parameters = operation.get('parameters', [])
+        url = path
+        for parameter in parameters:
+            if parameter['in'] == 'path':
+                if parameter['name'] not in values:
+                    return [(None, None, f"no value for {{{parameter['name']}}}")]
+                url = url.replace(f"{{{parameter['name']}}}", values[parameter['name']])
+
+        body = None
+        for content in operation.get('requestBody', {}).get('content', {}).values():
+            if 'example' in content:
+                body = content['example']
+                break
+        if method in ('post', 'put', 'patch') and body is None:
+            return [(None, None, 'no example')]
+
+        queries = {None: {}}
+        query_parameters = [parameter for parameter in parameters if parameter['in'] == 'query']
+        named = [name for parameter in query_parameters for name in parameter.get('examples', {})]
+        if named:
+            queries = dict.fromkeys(named)
+            for name in queries:
+                queries[name] = {parameter['name']: parameter['examples'][name]['value']
+                                 for parameter in query_parameters if name in parameter.get('examples', {})}
+        else:
+            queries[None] = {parameter['name']: parameter['example']
+                             for parameter in query_parameters if 'example' in parameter}
+        requests = []
+        for name, query in queries.items():
+            query = {key: values.get(key, value) for key, value in query.items()}
+            requests.append((name, (method.upper(), url, query, body), None))
+        return requests
+
+    @staticmethod
+    def replay(client, token, method, url, query, body):
+        """One request, rolled back afterwards; returns (status, seconds, response bytes, queries)"""
+        savepoint = transaction.savepoint()
+        try:
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = client.generic(
+                    method, f'{url}?{urlencode(query)}' if query else url,
+                    data=json.dumps(body) if body is not None else '', content_type='application/json',
+                    HTTP_AUTHORIZATION=f'Bearer {token}',
+                )
+                size = len(b''.join(response.streaming_content) if response.streaming else response.content)
+                elapsed = time.perf_counter() - started
+        finally:
+            transaction.savepoint_rollback(savepoint)
+        counted = sum(1 for query in queries.captured_queries if not query['sql'].startswith(NOT_COUNTED))
+        return response.status_code, elapsed, size, counted
+
+    def report(self, name, samples, budget):
+        statuses = {status for status, _, _, _ in samples}
+        status = statuses.pop() if len(statuses) == 1 else 'mixed'
+        ms = statistics.median(elapsed for _, elapsed, _, _ in samples) * 1000
+        size = samples[0][2]
+        queries = max(count for _, _, _, count in samples)
+        shown_budget = '-' if budget is None else budget
+        self.stdout.write(f'{name:<{NAME_WIDTH}}{status:>7}{ms:>9.1f}{size:>9}{queries:>9}{shown_budget:>8}')
+
+        problems = []
+        if status == 'mixed' or status >= 400:
+            problems.append(f'{name} returned {status}')
+        if budget is not None and queries > budget:
+            problems.append(f'{name} made {queries} queries, budget {budget}')
+        return problems
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('features', '0002_feature_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sort', models.CharField(choices=[('recent', 'Recent'), ('score', 'Score')], max_length=10)),
+                ('page', models.PositiveIntegerField()),
+                ('results', models.BinaryField()),
+                ('total_count', models.PositiveIntegerField()),
+                ('built_at', models.DateTimeField()),
+                ('dirty', models.BooleanField(default=False)),
+            ],
+            options={
+                'unique_together': {('sort', 'page')},
+            },
+        ),
+    ]
@@ -0,0 +1,102 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:02
+
+import django.db.models.deletion
+import features.models
+from django.db import migrations, models
+from django.db.models import Q
+
+
+def create_default_board(apps, schema_editor):
+    # Everything that existed before boards belongs to the default board
+    Board = apps.get_model('features', 'Board')
+    Feature = apps.get_model('features', 'Feature')
+    Vote = apps.get_model('features', 'Vote')
+    ArchivedFeature = apps.get_model('features', 'ArchivedFeature')
+    FeedSnapshot = apps.get_model('features', 'FeedSnapshot')
+
+    board, _ = Board.objects.get_or_create(slug='default', defaults={'name': 'Default'})
+    Feature.objects.update(board=board)
+    Vote.objects.update(board=board)
+    ArchivedFeature.objects.update(board=board)
+    # Snapshots are rebuilt per board by build_feed_snapshots
+    FeedSnapshot.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('features', '0004_soft_delete_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Board',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('slug', models.SlugField(unique=True)),
+                ('name', models.CharField(max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='feature',
+            name='board',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='features', to='features.board'),
+        ),
+        migrations.AddField(
+            model_name='vote',
+            name='board',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='votes', to='features.board'),
+        ),
+        migrations.AddField(
+            model_name='archivedfeature',
+            name='board',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='archived_features', to='features.board'),
+        ),
+        migrations.AddField(
+            model_name='feedsnapshot',
+            name='board',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='feed_snapshots', to='features.board'),
+        ),
+        migrations.RunPython(create_default_board, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='feature',
+            name='board',
+            field=models.ForeignKey(default=features.models.get_default_board_id, on_delete=django.db.models.deletion.CASCADE, related_name='features', to='features.board'),
+        ),
+        migrations.AlterField(
+            model_name='vote',
+            name='board',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='votes', to='features.board'),
+        ),
+        migrations.AlterField(
+            model_name='archivedfeature',
+            name='board',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_features', to='features.board'),
+        ),
+        migrations.AlterField(
+            model_name='feedsnapshot',
+            name='board',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_snapshots', to='features.board'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='feedsnapshot',
+            unique_together={('board', 'sort', 'page')},
+        ),
+        migrations.RemoveIndex(
+            model_name='feature',
+            name='feature_active_recent_idx',
+        ),
+        migrations.AddIndex(
+            model_name='feature',
+            index=models.Index(condition=Q(('status', 'active')), fields=['board', '-created_at'], name='feature_board_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vote',
+            index=models.Index(fields=['board', 'feature'], name='vote_board_feature_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vote',
+            index=models.Index(fields=['board', 'user'], name='vote_board_user_idx'),
+        ),
+    ]
@@ -0,0 +1,95 @@
+from django.db import migrations, models
+from django.db.models import Case, IntegerField, Q, Value, When
+
+VOTE_VALUES = {'upvote': 1, 'downvote': -1}
+
+
+def strings_to_values(apps, schema_editor):
+    for model_name in ('Vote', 'ArchivedVote'):
+        model = apps.get_model('features', model_name)
+        model.objects.update(vote_value=Case(
+            *[When(vote_type=name, then=Value(value)) for name, value in VOTE_VALUES.items()],
+            output_field=IntegerField(),
+        ))
+
+
+def values_to_strings(apps, schema_editor):
+    for model_name in ('Vote', 'ArchivedVote'):
+        model = apps.get_model('features', model_name)
+        model.objects.update(vote_type=Case(
+            *[When(vote_value=value, then=Value(name)) for name, value in VOTE_VALUES.items()],
+            output_field=models.CharField(),
+        ))
+
+
+class Migration(migrations.Migration):
+    """
+    Store vote_type as +1/-1 instead of 'upvote'/'downvote'. The values are
+    copied through a temporary vote_value column so existing rows survive.
+    """
+
+    dependencies = [
+        ('features', '0007_featurechange'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vote',
+            name='vote_value',
+            field=models.SmallIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='archivedvote',
+            name='vote_value',
+            field=models.SmallIntegerField(null=True),
+        ),
+        migrations.RunPython(strings_to_values, values_to_strings),
+        migrations.AlterUniqueTogether(
+            name='vote',
+            unique_together=set(),
+        ),
+        migrations.RemoveField(
+            model_name='vote',
+            name='vote_type',
+        ),
+        migrations.RemoveField(
+            model_name='archivedvote',
+            name='vote_type',
+        ),
+        migrations.RenameField(
+            model_name='vote',
+            old_name='vote_value',
+            new_name='vote_type',
+        ),
+        migrations.RenameField(
+            model_name='archivedvote',
+            old_name='vote_value',
+            new_name='vote_type',
+        ),
+        migrations.AlterField(
+            model_name='vote',
+            name='vote_type',
+            field=models.SmallIntegerField(choices=[(1, 'Upvote'), (-1, 'Downvote')]),
+        ),
+        migrations.AlterField(
+            model_name='archivedvote',
+            name='vote_type',
+            field=models.SmallIntegerField(choices=[(1, 'Upvote'), (-1, 'Downvote')]),
+        ),
+        migrations.AddConstraint(
+            model_name='vote',
+            constraint=models.UniqueConstraint(fields=('user', 'feature'), name='vote_unique_user_feature'),
+        ),
+        migrations.AddConstraint(
+            model_name='vote',
+            constraint=models.CheckConstraint(condition=Q(vote_type__in=[1, -1]), name='vote_type_valid'),
+        ),
+        migrations.AddIndex(
+            model_name='vote',
+            index=models.Index(fields=['feature', 'vote_type'], name='vote_feature_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vote',
+            index=models.Index(fields=['user', 'feature', 'vote_type'], name='vote_user_feature_type_idx'),
+        ),
+    ]
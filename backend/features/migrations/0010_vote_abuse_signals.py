@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('features', '0009_webhook_outbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FlaggedVote',
+            fields=[
+                ('vote', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='flag', serialize=False, to='features.vote')),
+                ('reason', models.CharField(max_length=30)),
+                ('flagged_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='vote',
+            name='ip_address',
+            field=models.GenericIPAddressField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='vote',
+            name='user_agent',
+            field=models.CharField(blank=True, max_length=200),
+        ),
+    ]
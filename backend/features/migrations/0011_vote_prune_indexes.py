@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:28
+
+import django.db.models.deletion
+import features.models
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('features', '0010_vote_abuse_signals'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='vote',
+            name='vote_board_feature_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='vote',
+            name='vote_user_feature_type_idx',
+        ),
+        migrations.AlterField(
+            model_name='vote',
+            name='board',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='votes', to='features.board'),
+        ),
+        migrations.AlterField(
+            model_name='vote',
+            name='feature',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='votes', to='features.feature'),
+        ),
+        migrations.AlterField(
+            model_name='vote',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='votes', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RemoveConstraint(
+            model_name='vote',
+            name='vote_unique_user_feature',
+        ),
+        migrations.AddConstraint(
+            model_name='vote',
+            constraint=features.models.CoveringUniqueConstraint(fields=('user', 'feature'), include=('vote_type',), name='vote_unique_user_feature'),
+        ),
+    ]
@@ -1,8 +1,136 @@
+from django.conf import settings
 from django.db import models
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Left
 from django.contrib.auth.models import User
+from django.utils import timezone
 import uuid
 
 
+class FeatureQuerySet(models.QuerySet):
+    COUNT_FIELDS = {'upvote_count', 'downvote_count', 'total_score'}
+    COLUMN_FIELDS = {'title', 'description', 'created_at', 'updated_at'}
+
+    def with_vote_counts(self):
+        """
+        Annotate vote counts in the same query instead of two queries per feature.
+
+        Each count is a correlated subquery on the (feature, vote_type) index,
+        so it only runs for the rows actually returned: a page of the recent
+        feed costs the same however many features the board has.
+        """
+        if 'upvote_total' in self.query.annotations:
+            return self
+        return self.annotate(
+            upvote_total=self._vote_count(Vote.UPVOTE),
+            downvote_total=self._vote_count(Vote.DOWNVOTE),
+        )
+
+    @staticmethod
+    def _vote_count(vote_type):
+        votes = Vote.objects.filter(feature=OuterRef('pk'), vote_type=vote_type)
+        if settings.ABUSE_EXCLUDE_FLAGGED:
+            # Flagged votes stay in the table but stop counting
+            votes = votes.filter(flag__isnull=True)
+        counts = votes.order_by().values('feature').annotate(total=Count('vote_type')).values('total')
+        return Coalesce(Subquery(counts), 0)
+
+    def with_score(self):
+        """
+        Annotate counts and score with one aggregate over the votes. Ordering by
+        score needs every feature's count anyway, and a single GROUP BY beats a
+        pair of subqueries per feature. Apply before for_fields(), which then
+        reuses these counts.
+        """
+        if 'score' in self.query.annotations:
+            return self
+        if 'upvote_total' in self.query.annotations:
+            return self.annotate(score=F('upvote_total') - F('downvote_total'))
+        upvotes = Q(votes__vote_type=Vote.UPVOTE)
+        downvotes = Q(votes__vote_type=Vote.DOWNVOTE)
+        if settings.ABUSE_EXCLUDE_FLAGGED:
+            upvotes &= Q(votes__flag__isnull=True)
+            downvotes &= Q(votes__flag__isnull=True)
+        return self.annotate(
+            upvote_total=Count('votes__vote_type', filter=upvotes),
+            downvote_total=Count('votes__vote_type', filter=downvotes),
+        ).annotate(score=F('upvote_total') - F('downvote_total'))
+
+    def with_user_vote(self, user):
+        """Annotate the given user's vote type (or None) on each feature"""
+        return self.annotate(user_vote_type=Subquery(
+            Vote.objects.filter(feature=OuterRef('pk'), user=user).values('vote_type')[:1]
+        ))
+
+    def for_fields(self, fields=None, user=None, description_length=None):
+        """
+        Load only what the given serializer fields need.
+
+        Columns outside `fields` are deferred, and the author join, vote count
+        aggregation and user vote subquery are only added when a field needs
+        them. `fields=None` means every field. With `description_length` the
+        description is cut down in SQL rather than loaded in full.
+        """
+        wanted = set(fields) if fields is not None else (
+            self.COLUMN_FIELDS | self.COUNT_FIELDS | {'author', 'user_vote'}
+        )
+        queryset = self
+        columns = {'id'} | (wanted & self.COLUMN_FIELDS)
+
+        if 'author' in wanted:
+            queryset = queryset.select_related('author')
+            columns |= {'author', 'author__id', 'author__username'}
+        if description_length and 'description' in wanted:
+            # One extra character tells the serializer whether anything was cut
+            columns.discard('description')
+            queryset = queryset.annotate(description_preview=Left('description', description_length + 1))
+        if wanted & self.COUNT_FIELDS:
+            queryset = queryset.with_vote_counts()
+        if 'user_vote' in wanted and user is not None and user.is_authenticated:
+            queryset = queryset.with_user_vote(user)
+
+        return queryset.only(*columns)
+
+    def feed(self, sort='recent'):
+        """Active features in feed order; unknown sorts fall back to 'recent'"""
+        queryset = self.filter(status='active')
+        if sort == 'score':
+            # Vote counts are aggregated in SQL, so the whole feed can be ordered by score
+            return queryset.with_score().order_by('-score', '-created_at')
+        return queryset.order_by('-created_at')
+
+
+class Board(models.Model):
+    """A separate feedback board; every feature and vote belongs to exactly one"""
+    DEFAULT_SLUG = 'default'
+
+    slug = models.SlugField(unique=True)
+    name = models.CharField(max_length=100)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.name
+
+
+_default_board_id = None
+
+
+def get_default_board_id():
+    """Id of the board served by the unprefixed routes, cached for the process"""
+    global _default_board_id
+    if _default_board_id is None:
+        board, _ = Board.objects.get_or_create(slug=Board.DEFAULT_SLUG, defaults={'name': 'Default'})
+        _default_board_id = board.pk
+    return _default_board_id
+
+
+class ActiveFeatureManager(models.Manager.from_queryset(FeatureQuerySet)):
+    """Default manager: hides soft-deleted features"""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(status='active')
+
+
 class Feature(models.Model):
     STATUS_CHOICES = [
         ('active', 'Active'),
@@ -10,48 +138,322 @@ class Feature(models.Model):
     ]
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    board = models.ForeignKey(Board, on_delete=models.CASCADE, related_name='features',
+                              default=get_default_board_id)
     title = models.CharField(max_length=200)
     description = models.TextField()
     author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='features')
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='active')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    deleted_at = models.DateTimeField(null=True, blank=True)
+
+    objects = ActiveFeatureManager()
+    all_objects = FeatureQuerySet.as_manager()  # includes soft-deleted features
 
     class Meta:
         ordering = ['-created_at']
+        # Related lookups (vote.feature) must still reach soft-deleted features
+        base_manager_name = 'all_objects'
+        indexes = [
+            # Only active rows are indexed, so deleted features don't grow the feed index.
+            # Leading on board keeps each board's feed a contiguous index range.
+            models.Index(fields=['board', '-created_at'], name='feature_board_active_idx',
+                         condition=Q(status='active')),
+        ]
 
     def __str__(self):
         return self.title
 
+    def soft_delete(self):
+        self.status = 'deleted'
+        self.deleted_at = timezone.now()
+        self.save(update_fields=['status', 'deleted_at', 'updated_at'])
+
     @property
     def upvote_count(self):
-        return self.votes.filter(vote_type='upvote').count()
+        if hasattr(self, 'upvote_total'):
+            return self.upvote_total
+        return self.counted_votes().filter(vote_type=Vote.UPVOTE).count()
 
     @property
     def downvote_count(self):
-        return self.votes.filter(vote_type='downvote').count()
+        if hasattr(self, 'downvote_total'):
+            return self.downvote_total
+        return self.counted_votes().filter(vote_type=Vote.DOWNVOTE).count()
+
+    def counted_votes(self):
+        """Votes that count towards the score (all of them unless ABUSE_EXCLUDE_FLAGGED)"""
+        if settings.ABUSE_EXCLUDE_FLAGGED:
+            return self.votes.filter(flag__isnull=True)
+        return self.votes.all()
 
     @property
     def total_score(self):
         return self.upvote_count - self.downvote_count
 
 
+class CoveringUniqueConstraint(models.UniqueConstraint):
+    """
+    A UniqueConstraint with include= that stays enforced on databases without
+    covering indexes. Django skips such a constraint entirely there (SQLite),
+    so it is created as a plain unique index under the same name instead.
+    """
+
+    def _for(self, schema_editor):
+        if schema_editor.connection.features.supports_covering_indexes:
+            return None
+        return models.UniqueConstraint(fields=self.fields, name=self.name)
+
+    def constraint_sql(self, model, schema_editor):
+        plain = self._for(schema_editor)
+        if plain is None:
+            return super().constraint_sql(model, schema_editor)
+        # An index rather than an inline table constraint, so remove_sql() can drop it by name
+        schema_editor.deferred_sql.append(plain.create_sql(model, schema_editor))
+        return None
+
+    def create_sql(self, model, schema_editor):
+        plain = self._for(schema_editor)
+        return (plain or super()).create_sql(model, schema_editor)
+
+    def remove_sql(self, model, schema_editor):
+        plain = self._for(schema_editor)
+        return (plain or super()).remove_sql(model, schema_editor)
+
+    def _check(self, model, connection):
+        # "A constraint won't be created" doesn't apply: see constraint_sql()
+        return [error for error in super()._check(model, connection) if error.id != 'models.W039']
+
+
 class Vote(models.Model):
+    UPVOTE = 1
+    DOWNVOTE = -1
     VOTE_CHOICES = [
-        ('upvote', 'Upvote'),
-        ('downvote', 'Downvote'),
+        (UPVOTE, 'Upvote'),
+        (DOWNVOTE, 'Downvote'),
     ]
+    # Stored as +1/-1; the API still speaks these names (see VoteTypeField)
+    VOTE_NAMES = {UPVOTE: 'upvote', DOWNVOTE: 'downvote'}
+    VOTE_VALUES = {name: value for value, name in VOTE_NAMES.items()}
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='votes')
-    feature = models.ForeignKey(Feature, on_delete=models.CASCADE, related_name='votes')
-    vote_type = models.CharField(max_length=10, choices=VOTE_CHOICES)
+    # No single-column FK indexes: every FK leads one of the composite indexes below.
+    # board is copied from the feature.
+    board = models.ForeignKey(Board, on_delete=models.CASCADE, related_name='votes', db_index=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='votes', db_index=False)
+    feature = models.ForeignKey(Feature, on_delete=models.CASCADE, related_name='votes', db_index=False)
+    vote_type = models.SmallIntegerField(choices=VOTE_CHOICES)
+    # Client signals for the abuse analyzer (features/abuse.py); empty on older votes
+    ip_address = models.GenericIPAddressField(null=True, blank=True)
+    user_agent = models.CharField(max_length=200, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
-        unique_together = ('user', 'feature')
         ordering = ['-created_at']
+        constraints = [
+            # Also answers a user's vote on a feature (user_vote), from the index alone
+            # where the database supports INCLUDE
+            CoveringUniqueConstraint(fields=['user', 'feature'], include=['vote_type'],
+                                     name='vote_unique_user_feature'),
+            models.CheckConstraint(condition=Q(vote_type__in=[1, -1]), name='vote_type_valid'),
+        ]
+        indexes = [
+            # Per-feature up/down counts are answered from the index alone
+            models.Index(fields=['feature', 'vote_type'], name='vote_feature_type_idx'),
+            models.Index(fields=['board', 'user'], name='vote_board_user_idx'),
+            # A user's vote history, newest first
+            models.Index(fields=['user', '-created_at'], name='vote_user_recent_idx'),
+            # The abuse analyzer's replay and --loop polls, in (created_at, id) order
+            models.Index(fields=['created_at', 'id'], name='vote_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.vote_name} - {self.feature.title}"
+
+    @property
+    def vote_name(self):
+        return self.VOTE_NAMES[self.vote_type]
+
+    def save(self, *args, **kwargs):
+        if self.board_id is None:
+            self.board_id = self.feature.board_id
+        super().save(*args, **kwargs)
+
+
+class ArchivedFeature(models.Model):
+    """A soft-deleted feature moved out of the hot table by `manage.py archive_deleted_features`"""
+    id = models.UUIDField(primary_key=True, editable=False)
+    board = models.ForeignKey(Board, on_delete=models.CASCADE, related_name='archived_features')
+    title = models.CharField(max_length=200)
+    description = models.TextField()
+    author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_features')
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    deleted_at = models.DateTimeField(null=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.title
+
+
+class ArchivedVote(models.Model):
+    """A vote on an archived feature"""
+    id = models.UUIDField(primary_key=True, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_votes')
+    feature = models.ForeignKey(ArchivedFeature, on_delete=models.CASCADE, related_name='votes')
+    vote_type = models.SmallIntegerField(choices=Vote.VOTE_CHOICES)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.user_id} - {Vote.VOTE_NAMES[self.vote_type]} - {self.feature_id}"
+
+
+class FeatureChange(models.Model):
+    """
+    Append-only log of feature and vote writes, read by the delta sync
+    endpoint. The auto-increment id is the sync watermark. feature_id is a
+    plain column so entries outlive archived features.
+    """
+    id = models.BigAutoField(primary_key=True)
+    board = models.ForeignKey(Board, on_delete=models.CASCADE, related_name='feature_changes')
+    feature_id = models.UUIDField()
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, related_name='+')  # set for vote changes
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['board', 'id'], name='change_board_id_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.id} {self.feature_id}"
+
+
+class FeedSnapshot(models.Model):
+    """One pre-rendered page of the public feed, built by `manage.py build_feed_snapshots`"""
+    SORT_CHOICES = [
+        ('recent', 'Recent'),
+        ('score', 'Score'),
+    ]
+
+    board = models.ForeignKey(Board, on_delete=models.CASCADE, related_name='feed_snapshots')
+    sort = models.CharField(max_length=10, choices=SORT_CHOICES)
+    page = models.PositiveIntegerField()
+    results = models.BinaryField()  # JSON array of FeatureListSerializer rows, user_vote left null
+    total_count = models.PositiveIntegerField()
+    built_at = models.DateTimeField()
+    dirty = models.BooleanField(default=False)  # set when features or votes change after built_at
+
+    class Meta:
+        unique_together = ('board', 'sort', 'page')
+
+    def __str__(self):
+        return f"{self.board_id} {self.sort} page {self.page}"
+
+
+class OutboxEvent(models.Model):
+    """
+    A feature or vote write waiting for webhook dispatch. Rows are inserted
+    in the same transaction as the write itself (see features/outbox.py),
+    and `manage.py dispatch_webhooks` turns them into WebhookDeliveries and
+    deletes them.
+    """
+    FEATURE_CREATED = 'feature.created'
+    FEATURE_UPDATED = 'feature.updated'
+    VOTE_CHANGED = 'vote.changed'
+    EVENT_CHOICES = [
+        (FEATURE_CREATED, 'Feature created'),
+        (FEATURE_UPDATED, 'Feature updated'),
+        (VOTE_CHANGED, 'Vote changed'),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    board = models.ForeignKey(Board, on_delete=models.CASCADE, related_name='outbox_events')
+    event_type = models.CharField(max_length=20, choices=EVENT_CHOICES)
+    feature_id = models.UUIDField()
+    payload = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.id} {self.event_type} {self.feature_id}"
+
+
+class Webhook(models.Model):
+    """
+    An endpoint notified about one board. `events` lists what it receives:
+
+    - feature.created / feature.updated: one delivery per write
+    - feature.threshold: once per feature for each upvote count in `thresholds`
+    - feature.votes: vote activity, coalesced per feature per dispatch batch
+    """
+    EVENT_CHOICES = [
+        ('feature.created', 'Feature created'),
+        ('feature.updated', 'Feature updated'),
+        ('feature.threshold', 'Upvote threshold crossed'),
+        ('feature.votes', 'Vote activity summary'),
+    ]
+
+    board = models.ForeignKey(Board, on_delete=models.CASCADE, related_name='webhooks')
+    url = models.URLField()
+    secret = models.CharField(max_length=100, blank=True)  # signs the body (X-Webhook-Signature)
+    events = models.JSONField(default=list)
+    thresholds = models.JSONField(default=list)  # upvote counts, e.g. [10, 100, 1000]
+    active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Circuit breaker: after WEBHOOK_CIRCUIT_THRESHOLD straight failures nothing
+    # is sent until circuit_open_until, then a single trial delivery
+    consecutive_failures = models.PositiveIntegerField(default=0)
+    circuit_open_until = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return self.url
+
+
+class WebhookDelivery(models.Model):
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('delivered', 'Delivered'),
+        ('failed', 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    webhook = models.ForeignKey(Webhook, on_delete=models.CASCADE, related_name='deliveries')
+    event_type = models.CharField(max_length=20)
+    feature_id = models.UUIDField()
+    payload = models.JSONField()
+    # Set for deliveries that must only ever be created once, e.g. a threshold crossing
+    dedupe_key = models.CharField(max_length=100, null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    delivered_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['webhook', 'dedupe_key'], name='delivery_dedupe_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['next_attempt_at'], condition=Q(status='pending'), name='delivery_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type} -> {self.webhook_id} ({self.status})"
+
+
+class FlaggedVote(models.Model):
+    """
+    A vote the abuse analyzer (features/abuse.py) judged suspicious. The vote
+    itself is left untouched; with ABUSE_EXCLUDE_FLAGGED it stops counting
+    towards feature scores.
+    """
+    vote = models.OneToOneField(Vote, on_delete=models.CASCADE, primary_key=True, related_name='flag')
+    reason = models.CharField(max_length=30)
+    flagged_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
-        return f"{self.user.username} - {self.vote_type} - {self.feature.title}"
+        return f"{self.vote_id} ({self.reason})"
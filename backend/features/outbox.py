@@ -0,0 +1,29 @@
+"""
+Transactional outbox for webhook events.
+
+The views call these inside the same transaction.atomic() block as the
+write they describe. An event therefore exists exactly when its write
+committed, and delivery can happen later, out of band, in
+features/webhooks.py.
+"""
+from .models import OutboxEvent, Vote
+
+
+def record_feature_event(event_type, feature):
+    """OutboxEvent.FEATURE_CREATED or FEATURE_UPDATED for `feature`"""
+    OutboxEvent.objects.create(
+        board_id=feature.board_id, event_type=event_type, feature_id=feature.pk,
+        payload={'title': feature.title, 'author_id': feature.author_id},
+    )
+
+
+def record_vote_event(feature, user, vote_type, previous=None):
+    """A vote added, changed or removed; vote types are Vote.UPVOTE/Vote.DOWNVOTE, None for no vote"""
+    OutboxEvent.objects.create(
+        board_id=feature.board_id, event_type=OutboxEvent.VOTE_CHANGED, feature_id=feature.pk,
+        payload={
+            'user_id': user.pk,
+            'vote_type': Vote.VOTE_NAMES.get(vote_type),
+            'previous': Vote.VOTE_NAMES.get(previous),
+        },
+    )
@@ -0,0 +1,8 @@
+from rest_framework.pagination import CursorPagination
+
+
+class VoteHistoryPagination(CursorPagination):
+    """Newest votes first; the cursor walks the (user, created_at) index instead of using OFFSET"""
+    ordering = '-created_at'
+    page_size_query_param = 'page_size'
+    max_page_size = 100
@@ -0,0 +1,23 @@
+from rest_framework.renderers import JSONRenderer
+
+
+class CompactJSONRenderer(JSONRenderer):
+    """
+    Columnar JSON for paginated lists, selected with ?format=compact or the
+    media type below. Instead of repeating every key in every row, `results`
+    becomes `columns`: one array per field, e.g.
+
+        {"count": 2, "next": null, "previous": null,
+         "columns": {"id": ["a", "b"], "title": ["A", "B"], "total_score": [3, 1]}}
+
+    Responses that aren't paginated lists are rendered as plain JSON.
+    """
+    media_type = 'application/vnd.featurevoting.compact+json'
+    format = 'compact'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, dict) and isinstance(data.get('results'), list):
+            rows = data['results']
+            data = {key: value for key, value in data.items() if key != 'results'}
+            data['columns'] = {name: [row[name] for row in rows] for name in (rows[0] if rows else ())}
+        return super().render(data, accepted_media_type, renderer_context)
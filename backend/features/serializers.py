@@ -3,13 +3,62 @@ from django.contrib.auth.models import User
 from .models import Feature, Vote
 
 
+class SparseFieldsMixin:
+    """Drop any fields not listed in context['fields'] (None keeps them all)"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        selected = self.context.get('fields')
+        if selected is not None:
+            for name in set(self.fields) - set(selected):
+                self.fields.pop(name)
+
+
+class TruncatedTextField(serializers.CharField):
+    """Read-only text cut to `length` characters, with an ellipsis when shortened"""
+
+    def __init__(self, length, **kwargs):
+        self.length = length
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        if len(value) > self.length:
+            return value[:self.length] + '…'
+        return value
+
+
+class FeatureFieldsMixin(SparseFieldsMixin):
+    """Shared read behaviour for the feature serializers"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        length = self.context.get('description_length')
+        if length and 'description' in self.fields:
+            # Reads the SQL-truncated annotation from FeatureQuerySet.for_fields()
+            self.fields['description'] = TruncatedTextField(length, source='description_preview')
+
+    def get_user_vote(self, obj):
+        """Return the current user's vote on this feature, if any"""
+        if hasattr(obj, 'user_vote_type'):
+            return Vote.VOTE_NAMES.get(obj.user_vote_type)
+        request = self.context.get('request')
+        if request and request.user.is_authenticated:
+            try:
+                vote = Vote.objects.get(user=request.user, feature=obj)
+                return vote.vote_name
+            except Vote.DoesNotExist:
+                return None
+        return None
+
+
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ('id', 'username')
 
 
-class FeatureSerializer(serializers.ModelSerializer):
+class FeatureSerializer(FeatureFieldsMixin, serializers.ModelSerializer):
     author = UserSerializer(read_only=True)
     upvote_count = serializers.ReadOnlyField()
     downvote_count = serializers.ReadOnlyField()
@@ -28,17 +77,6 @@ class FeatureSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Description cannot exceed 1000 characters")
         return value
 
-    def get_user_vote(self, obj):
-        """Return the current user's vote on this feature, if any"""
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            try:
-                vote = Vote.objects.get(user=request.user, feature=obj)
-                return vote.vote_type
-            except Vote.DoesNotExist:
-                return None
-        return None
-
     def create(self, validated_data):
         validated_data['author'] = self.context['request'].user
         feature = super().create(validated_data)
@@ -48,13 +86,13 @@ class FeatureSerializer(serializers.ModelSerializer):
         Vote.objects.create(
             user=self.context['request'].user,
             feature=feature,
-            vote_type='upvote'
+            vote_type=Vote.UPVOTE
         )
 
         return feature
 
 
-class FeatureListSerializer(serializers.ModelSerializer):
+class FeatureListSerializer(FeatureFieldsMixin, serializers.ModelSerializer):
     """Simplified serializer for feature lists"""
     author = UserSerializer(read_only=True)
     upvote_count = serializers.ReadOnlyField()
@@ -67,38 +105,50 @@ class FeatureListSerializer(serializers.ModelSerializer):
         fields = ('id', 'title', 'description', 'author', 'created_at', 'upvote_count',
                  'downvote_count', 'total_score', 'user_vote')
 
-    def get_user_vote(self, obj):
-        """Return the current user's vote on this feature, if any"""
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            try:
-                vote = Vote.objects.get(user=request.user, feature=obj)
-                return vote.vote_type
-            except Vote.DoesNotExist:
-                return None
-        return None
 
+class VoteTypeField(serializers.ChoiceField):
+    """'upvote'/'downvote' on the wire, Vote.UPVOTE/Vote.DOWNVOTE in the database"""
+    default_error_messages = {
+        'invalid_choice': "Vote type must be 'upvote' or 'downvote'",
+    }
+
+    def __init__(self, **kwargs):
+        super().__init__(choices=list(Vote.VOTE_VALUES), **kwargs)
 
-class VoteSerializer(serializers.ModelSerializer):
+    def to_internal_value(self, data):
+        return Vote.VOTE_VALUES[super().to_internal_value(data)]
+
+    def to_representation(self, value):
+        return Vote.VOTE_NAMES.get(value)
+
+
+class VoteSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     feature = serializers.PrimaryKeyRelatedField(read_only=True)
+    vote_type = VoteTypeField()
 
     class Meta:
         model = Vote
         fields = ('id', 'user', 'feature', 'vote_type', 'created_at')
         read_only_fields = ('id', 'created_at')
 
-    def validate_vote_type(self, value):
-        if value not in ['upvote', 'downvote']:
-            raise serializers.ValidationError("Vote type must be 'upvote' or 'downvote'")
-        return value
+
+class FeatureSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Feature
+        fields = ('id', 'title', 'created_at')
+
+
+class UserVoteSerializer(serializers.ModelSerializer):
+    """A vote in the current user's history, with a summary of the feature"""
+    feature = FeatureSummarySerializer(read_only=True)
+    vote_type = VoteTypeField(read_only=True)
+
+    class Meta:
+        model = Vote
+        fields = ('id', 'vote_type', 'created_at', 'feature')
 
 
 class VoteActionSerializer(serializers.Serializer):
     """Serializer for vote toggle actions"""
-    vote_type = serializers.ChoiceField(choices=['upvote', 'downvote'])
-
-    def validate_vote_type(self, value):
-        if value not in ['upvote', 'downvote']:
-            raise serializers.ValidationError("Vote type must be 'upvote' or 'downvote'")
-        return value
\ No newline at end of file
+    vote_type = VoteTypeField()
\ No newline at end of file
@@ -0,0 +1,157 @@
+"""
+Pre-rendered feed pages.
+
+The feed is read far more often than it changes, so `build_feed_snapshots`
+renders the first FEED_SNAPSHOT_PAGES pages of each sort into FeedSnapshot
+rows, separately for each board. With FEED_SNAPSHOT_ENABLED, FeatureListView serves plain page requests
+straight from those bytes, overlaying only the caller's own votes. Any write
+to a feature or vote marks its board's snapshots dirty so the builder picks them up.
+A clean snapshot is current however old it is, so boards nobody writes to are never
+re-rendered; a dirty one is served only while younger than FEED_SNAPSHOT_MAX_AGE,
+which bounds staleness even if the builder stops. Responses carry X-Feed-Snapshot-Age.
+"""
+import json
+import math
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.http import HttpResponse
+from django.utils import timezone
+
+from .models import Board, Feature, FeedSnapshot, Vote
+
+# DRF and the serializers are imported inside the functions that use them:
+# FeaturesConfig.ready() imports this module for mark_dirty, and that
+# shouldn't pull the whole serializer stack into every process at setup.
+
+SORTS = [sort for sort, _ in FeedSnapshot.SORT_CHOICES]
+
+
+def build_snapshots(board_ids=None, pages=None, page_size=None):
+    """Render and store the first `pages` pages of every sort for the given boards (default all)"""
+    pages = pages or settings.FEED_SNAPSHOT_PAGES
+    page_size = page_size or settings.REST_FRAMEWORK['PAGE_SIZE']
+    if board_ids is None:
+        board_ids = list(Board.objects.values_list('pk', flat=True))
+
+    written = 0
+    for board_id in board_ids:
+        snapshots = _render_board(board_id, pages, page_size)
+        with transaction.atomic():
+            FeedSnapshot.objects.filter(board_id=board_id).delete()
+            FeedSnapshot.objects.bulk_create(snapshots)
+        written += len(snapshots)
+    return written
+
+
+def _render_board(board_id, pages, page_size):
+    from rest_framework.renderers import JSONRenderer
+    from .serializers import FeatureListSerializer
+
+    renderer = JSONRenderer()
+    built_at = timezone.now()
+    snapshots = []
+    for sort in SORTS:
+        queryset = Feature.objects.filter(board_id=board_id).feed(sort).for_fields(FeatureListSerializer.Meta.fields)
+        total_count = queryset.count()
+        features = list(queryset[:pages * page_size])
+        for page in range(1, pages + 1):
+            rows = features[(page - 1) * page_size:page * page_size]
+            if not rows and page > 1:
+                break
+            data = FeatureListSerializer(rows, many=True, context={}).data
+            snapshots.append(FeedSnapshot(board_id=board_id, sort=sort, page=page, results=renderer.render(data),
+                                          total_count=total_count, built_at=built_at))
+    return snapshots
+
+
+def mark_dirty(instance, **kwargs):
+    """Signal receiver: flag the board's snapshots for rebuild after a feature or vote write"""
+    if settings.FEED_SNAPSHOT_ENABLED:
+        FeedSnapshot.objects.filter(board_id=instance.board_id, dirty=False).update(dirty=True)
+
+
+def boards_needing_rebuild():
+    """Ids of boards whose snapshots are dirty or missing"""
+    board_ids = list(FeedSnapshot.objects.filter(dirty=True).order_by().values_list('board_id', flat=True).distinct())
+    board_ids += Board.objects.filter(feed_snapshots__isnull=True).values_list('pk', flat=True)
+    return board_ids
+
+
+def snapshot_status():
+    """Snapshot age in seconds and dirty flag per board and sort, for monitoring"""
+    now = timezone.now()
+    status = {}
+    rows = FeedSnapshot.objects.filter(page=1).values_list('board__slug', 'sort', 'built_at', 'dirty')
+    for slug, sort, built_at, dirty in rows:
+        status[f'{slug}/{sort}'] = {'age': (now - built_at).total_seconds(), 'dirty': dirty}
+    return status
+
+
+def snapshot_response(request, paginator, board_id):
+    """
+    Serve a feed page from its snapshot, or return None to fall back to the
+    live query (non-default parameters, pages beyond the snapshot, or a
+    dirty snapshot older than FEED_SNAPSHOT_MAX_AGE).
+    """
+    from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+    params = request.query_params
+    if set(params) - {'sort', 'page'} or request.accepted_renderer.format != 'json':
+        return None
+
+    sort = params.get('sort', 'recent')
+    if sort not in SORTS:
+        sort = 'recent'
+    try:
+        page = int(params.get('page', 1))
+    except ValueError:
+        return None
+
+    oldest_allowed = timezone.now() - timedelta(seconds=settings.FEED_SNAPSHOT_MAX_AGE)
+    snapshot = FeedSnapshot.objects.filter(
+        Q(dirty=False) | Q(built_at__gte=oldest_allowed), board_id=board_id, sort=sort, page=page
+    ).first()
+    if snapshot is None:
+        return None
+
+    results = bytes(snapshot.results)
+    if request.user.is_authenticated:
+        results = overlay_user_votes(results, request.user)
+
+    url = request.build_absolute_uri()
+    num_pages = max(1, math.ceil(snapshot.total_count / paginator.page_size))
+    next_link = replace_query_param(url, paginator.page_query_param, page + 1) if page < num_pages else None
+    if page == 1:
+        previous_link = None
+    elif page == 2:
+        previous_link = remove_query_param(url, paginator.page_query_param)
+    else:
+        previous_link = replace_query_param(url, paginator.page_query_param, page - 1)
+
+    body = b''.join([
+        b'{"count":', str(snapshot.total_count).encode(),
+        b',"next":', json.dumps(next_link).encode(),
+        b',"previous":', json.dumps(previous_link).encode(),
+        b',"results":', results, b'}',
+    ])
+    response = HttpResponse(body, content_type='application/json')
+    response['X-Feed-Snapshot-Age'] = f'{(timezone.now() - snapshot.built_at).total_seconds():.1f}'
+    return response
+
+
+def overlay_user_votes(results, user):
+    """Fill in user_vote on pre-rendered rows with one query for the page's features"""
+    from rest_framework.renderers import JSONRenderer
+
+    rows = json.loads(results)
+    votes = Vote.objects.filter(user=user, feature_id__in=[row['id'] for row in rows])
+    user_votes = {
+        str(feature_id): Vote.VOTE_NAMES[vote_type]
+        for feature_id, vote_type in votes.values_list('feature_id', 'vote_type')
+    }
+    for row in rows:
+        row['user_vote'] = user_votes.get(row['id'])
+    return JSONRenderer().render(rows)
@@ -0,0 +1,99 @@
+"""
+Delta sync for mobile clients.
+
+Every feature write (create, edit, soft delete) and every vote write adds a
+FeatureChange row through signals. A sync token encodes the board and the
+last change id the client has seen, so `GET /api/sync/?since=<token>` only
+has to read the board's log entries past that id and load the features they
+mention.
+
+Ids are handed out when a row is inserted, not when its transaction commits,
+so a slow write can commit an entry below a token that was already issued.
+Each sync therefore also re-reads the entries written up to
+SYNC_OVERLAP_SECONDS before the token's own entry, the way analyze_votes
+re-reads POLL_OVERLAP. Clients apply changes idempotently, so sending a
+feature twice is harmless.
+"""
+import base64
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import FeatureChange
+
+RESET = 'reset'
+
+
+def encode_token(board_id, change_id):
+    return base64.urlsafe_b64encode(f'{board_id}:{change_id}'.encode()).decode().rstrip('=')
+
+
+def decode_token(token):
+    """Return (board_id, change_id), or raise ValueError for a malformed token"""
+    padded = token + '=' * (-len(token) % 4)
+    try:
+        board_id, change_id = base64.urlsafe_b64decode(padded.encode()).decode().split(':')
+        return int(board_id), int(change_id)
+    except (UnicodeDecodeError, ValueError) as exc:
+        raise ValueError('Invalid sync token') from exc
+
+
+def record_feature_change(instance, **kwargs):
+    """Signal receiver for Feature saves and deletes"""
+    FeatureChange.objects.create(board_id=instance.board_id, feature_id=instance.pk)
+
+
+def record_vote_change(instance, **kwargs):
+    """Signal receiver for Vote saves and deletes; also changes the feature's counts"""
+    FeatureChange.objects.create(board_id=instance.board_id, feature_id=instance.feature_id,
+                                 user_id=instance.user_id)
+
+
+def changes_since(board_id, since, limit):
+    """
+    Return (last_change_id, feature_ids, feature_ids_by_voter, has_more) for
+    up to `limit` log entries after `since`, plus those in the overlap behind
+    it. If the client must refetch everything instead (no token, or its entry
+    has been pruned), feature_ids is RESET and last_change_id is the current
+    head of the log.
+    """
+    overlap = []
+    if since:
+        # Newest first, so the first row is the token's own entry
+        behind = list(
+            FeatureChange.objects.filter(board_id=board_id, id__lte=since)
+            .order_by('-id').values_list('id', 'created_at', 'feature_id', 'user_id')
+            [:limit if settings.SYNC_OVERLAP_SECONDS else 1]
+        )
+        if not behind or behind[0][0] != since:
+            since = None
+        else:
+            cutoff = behind[0][1] - timedelta(seconds=settings.SYNC_OVERLAP_SECONDS)
+            overlap = [(change_id, feature_id, user_id)
+                       for change_id, created_at, feature_id, user_id in reversed(behind[1:])
+                       if created_at >= cutoff]
+    if since is None:
+        latest = FeatureChange.objects.filter(board_id=board_id).order_by('-id').values_list('id', flat=True).first()
+        return latest or 0, RESET, {}, False
+
+    entries = list(
+        FeatureChange.objects.filter(board_id=board_id, id__gt=since)
+        .order_by('id').values_list('id', 'feature_id', 'user_id')[:limit + 1]
+    )
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    feature_ids = list(dict.fromkeys(feature_id for _, feature_id, _ in overlap + entries))
+    feature_ids_by_voter = {}
+    for _, feature_id, user_id in overlap + entries:
+        if user_id is not None:
+            feature_ids_by_voter.setdefault(user_id, set()).add(feature_id)
+    last_id = entries[-1][0] if entries else since
+    return last_id, feature_ids, feature_ids_by_voter, has_more
+
+
+def prune_changes(days=None):
+    """Delete log entries older than SYNC_LOG_RETENTION_DAYS; clients holding older tokens get a reset"""
+    cutoff = timezone.now() - timedelta(days=days or settings.SYNC_LOG_RETENTION_DAYS)
+    return FeatureChange.objects.filter(created_at__lt=cutoff).delete()[0]
@@ -1,19 +1,50 @@
-from django.test import TestCase
+import gzip
+import hashlib
+import hmac
+import json
+import threading
+from io import StringIO
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from uuid import UUID
+from unittest import mock
+
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.db.models import F
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from django.contrib.auth.models import User
-from rest_framework.test import APITestCase
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase
 from rest_framework import status
 from rest_framework_simplejwt.tokens import RefreshToken
-from .models import Feature, Vote
+from .abuse import HyperLogLog, VoteAnalyzer, VoteEvent, vote_events
+from .archival import archive_deleted_features
+from .factories import create_users, create_vote_graph, create_votes
+from .models import (ArchivedFeature, Board, Feature, FeatureChange, FeedSnapshot, FlaggedVote, OutboxEvent,
+                     Vote, Webhook, WebhookDelivery)
+from .outbox import record_vote_event
+from .snapshots import boards_needing_rebuild, build_snapshots
+from .throttling import VoteRateThrottle
+from .views import FeatureVotersView
+from .webhooks import deliver, plan
+from config import settings_api
+from config.middleware import choose_encoding
 
 
 class FeatureModelTest(TestCase):
-    def setUp(self):
-        self.user1 = User.objects.create_user(username='user1', password='pass123')
-        self.user2 = User.objects.create_user(username='user2', password='pass123')
-        self.feature = Feature.objects.create(
+    @classmethod
+    def setUpTestData(cls):
+        cls.user1 = User.objects.create_user(username='user1', password='pass123')
+        cls.user2 = User.objects.create_user(username='user2', password='pass123')
+        cls.feature = Feature.objects.create(
             title='Test Feature',
             description='Test description',
-            author=self.user1
+            author=cls.user1
         )
 
     def test_feature_creation(self):
@@ -26,7 +57,7 @@ class FeatureModelTest(TestCase):
         self.assertEqual(self.feature.upvote_count, 0)
 
         # Add upvote
-        Vote.objects.create(user=self.user2, feature=self.feature, vote_type='upvote')
+        Vote.objects.create(user=self.user2, feature=self.feature, vote_type=Vote.UPVOTE)
         self.assertEqual(self.feature.upvote_count, 1)
 
     def test_downvote_count_calculation(self):
@@ -34,56 +65,76 @@ class FeatureModelTest(TestCase):
         self.assertEqual(self.feature.downvote_count, 0)
 
         # Add downvote
-        Vote.objects.create(user=self.user2, feature=self.feature, vote_type='downvote')
+        Vote.objects.create(user=self.user2, feature=self.feature, vote_type=Vote.DOWNVOTE)
         self.assertEqual(self.feature.downvote_count, 1)
 
     def test_total_score_calculation(self):
         # Add upvote and downvote
-        Vote.objects.create(user=self.user2, feature=self.feature, vote_type='upvote')
-        Vote.objects.create(user=self.user1, feature=self.feature, vote_type='downvote')
+        Vote.objects.create(user=self.user2, feature=self.feature, vote_type=Vote.UPVOTE)
+        Vote.objects.create(user=self.user1, feature=self.feature, vote_type=Vote.DOWNVOTE)
 
         # Score should be upvotes - downvotes = 1 - 1 = 0
         self.assertEqual(self.feature.total_score, 0)
 
 
 class VoteModelTest(TestCase):
-    def setUp(self):
-        self.user = User.objects.create_user(username='user1', password='pass123')
-        self.feature = Feature.objects.create(
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='user1', password='pass123')
+        cls.feature = Feature.objects.create(
             title='Test Feature',
             description='Test description',
-            author=self.user
+            author=cls.user
         )
 
     def test_vote_creation(self):
         vote = Vote.objects.create(
             user=self.user,
             feature=self.feature,
-            vote_type='upvote'
+            vote_type=Vote.UPVOTE
         )
-        self.assertEqual(vote.vote_type, 'upvote')
+        self.assertEqual(vote.vote_type, Vote.UPVOTE)
         self.assertEqual(vote.user, self.user)
         self.assertEqual(vote.feature, self.feature)
 
     def test_unique_user_feature_constraint(self):
         # Create first vote
-        Vote.objects.create(user=self.user, feature=self.feature, vote_type='upvote')
+        Vote.objects.create(user=self.user, feature=self.feature, vote_type=Vote.UPVOTE)
 
         # Attempt to create duplicate vote should fail
         with self.assertRaises(Exception):
-            Vote.objects.create(user=self.user, feature=self.feature, vote_type='downvote')
+            Vote.objects.create(user=self.user, feature=self.feature, vote_type=Vote.DOWNVOTE)
+
+    def test_vote_type_check_constraint(self):
+        with self.assertRaises(IntegrityError):
+            Vote.objects.create(user=self.user, feature=self.feature, vote_type=0)
+
+    def test_every_foreign_key_leads_an_index(self):
+        # And no index is a prefix of another
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, Vote._meta.db_table)
+        indexes = {tuple(info['columns']) for info in constraints.values()
+                   if (info['index'] or info['unique']) and not info['primary_key']}
+        self.assertEqual(indexes, {
+            ('user_id', 'feature_id'), ('feature_id', 'vote_type'),
+            ('board_id', 'user_id'), ('user_id', 'created_at'), ('created_at', 'id'),
+        })
 
 
 class FeatureAPITest(APITestCase):
-    def setUp(self):
-        self.user = User.objects.create_user(username='testuser', password='pass123')
-        self.token = RefreshToken.for_user(self.user).access_token
-        self.feature = Feature.objects.create(
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='testuser', password='pass123')
+        cls.feature = Feature.objects.create(
             title='Test Feature',
             description='Test description',
-            author=self.user
+            author=cls.user
         )
 
+    def setUp(self):
+        cache.clear()
+        self.token = RefreshToken.for_user(self.user).access_token
+
     def test_list_features_no_auth_required(self):
         response = self.client.get('/api/features/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -138,9 +189,903 @@ class FeatureAPITest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['action'], 'changed')
 
+    def test_invalid_vote_type_rejected(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        response = self.client.post(f'/api/feature/{self.feature.id}/vote/', {'vote_type': 'sideways'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['vote_type'], ["Vote type must be 'upvote' or 'downvote'"])
+
     def test_vote_requires_auth(self):
         # Without auth
         response = self.client.post(f'/api/feature/{self.feature.id}/vote/', {
             'vote_type': 'upvote'
         })
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class ThrottleTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='voter', password='pass123')
+        self.token = RefreshToken.for_user(self.user).access_token
+        self.feature = Feature.objects.create(
+            title='Test Feature',
+            description='Test description',
+            author=self.user
+        )
+
+    @override_settings(REST_FRAMEWORK={
+        'DEFAULT_AUTHENTICATION_CLASSES': ('rest_framework_simplejwt.authentication.JWTAuthentication',),
+        'DEFAULT_THROTTLE_RATES': {'vote': '3/min'},
+    })
+    def test_vote_throttled_per_user(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        for _ in range(3):
+            response = self.client.post(f'/api/feature/{self.feature.id}/vote/', {'vote_type': 'upvote'})
+            self.assertIn(response.status_code, (status.HTTP_200_OK, status.HTTP_201_CREATED))
+
+        response = self.client.post(f'/api/feature/{self.feature.id}/vote/', {'vote_type': 'upvote'})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', response)
+
+    @override_settings(REST_FRAMEWORK={'DEFAULT_THROTTLE_RATES': {'feed_anon': '2/min'}})
+    def test_anonymous_feed_throttled(self):
+        for _ in range(2):
+            self.assertEqual(self.client.get('/api/features/').status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.get('/api/features/').status_code,
+                         status.HTTP_429_TOO_MANY_REQUESTS)
+
+    @override_settings(REST_FRAMEWORK={'DEFAULT_THROTTLE_RATES': {'vote': '10/min'}})
+    def test_sliding_window_weights_previous_window(self):
+        request = Request(APIRequestFactory().post('/'))
+        request.user = self.user
+        throttle = VoteRateThrottle()
+
+        # Use up the whole quota late in one window
+        throttle.timer = lambda: 59.0
+        for _ in range(10):
+            self.assertTrue(throttle.allow_request(request, None))
+        self.assertFalse(throttle.allow_request(request, None))
+
+        # A quarter into the next window, 75% of the previous one still counts
+        throttle.timer = lambda: 75.0
+        self.assertTrue(throttle.allow_request(request, None))
+        self.assertTrue(throttle.allow_request(request, None))
+        self.assertFalse(throttle.allow_request(request, None))
+        self.assertGreater(throttle.wait(), 0)
+
+
+class SparseFieldsTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='author', password='pass123')
+        cls.voter = User.objects.create_user(username='voter', password='pass123')
+        cls.features = [
+            Feature.objects.create(title=f'Feature {i}', description='x' * 500, author=cls.user)
+            for i in range(5)
+        ]
+        Vote.objects.create(user=cls.voter, feature=cls.features[0], vote_type=Vote.UPVOTE)
+        Vote.objects.create(user=cls.user, feature=cls.features[0], vote_type=Vote.UPVOTE)
+        Vote.objects.create(user=cls.voter, feature=cls.features[1], vote_type=Vote.DOWNVOTE)
+
+    def setUp(self):
+        cache.clear()
+        self.token = RefreshToken.for_user(self.voter).access_token
+
+    def test_list_fields_selection(self):
+        response = self.client.get('/api/features/?fields=title,total_score')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data['results'][0]), {'id', 'title', 'total_score'})
+
+    def test_list_omit(self):
+        response = self.client.get('/api/features/?omit=description,author')
+        item = response.data['results'][0]
+        self.assertNotIn('description', item)
+        self.assertNotIn('author', item)
+        self.assertIn('upvote_count', item)
+
+    def test_unknown_field_rejected(self):
+        response = self.client.get('/api/features/?fields=title,secret')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_list_query_count_independent_of_page_size(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        # JWT user lookup, pagination count and the page itself
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/features/')
+        scores = {item['title']: (item['total_score'], item['user_vote']) for item in response.data['results']}
+        self.assertEqual(scores['Feature 0'], (2, 'upvote'))
+        self.assertEqual(scores['Feature 1'], (-1, 'downvote'))
+
+    def test_sparse_list_skips_joins(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/api/features/?fields=title')
+        page_sql = queries.captured_queries[-1]['sql']
+        self.assertNotIn('features_vote', page_sql)
+        self.assertNotIn('auth_user', page_sql)
+        self.assertNotIn('description', page_sql)
+
+    def test_sort_by_score_in_database(self):
+        response = self.client.get('/api/features/?sort=score&fields=title,total_score')
+        scores = [item['total_score'] for item in response.data['results']]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+        self.assertEqual(response.data['results'][0]['title'], 'Feature 0')
+
+    def test_truncated_description(self):
+        response = self.client.get('/api/features/?description_length=20')
+        description = response.data['results'][0]['description']
+        self.assertEqual(description, 'x' * 20 + '…')
+
+        response = self.client.get('/api/features/?description_length=abc')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_detail_fields_selection(self):
+        response = self.client.get(f'/api/feature/{self.features[0].id}/?fields=title,upvote_count')
+        self.assertEqual(response.data, {
+            'id': str(self.features[0].id), 'title': 'Feature 0', 'upvote_count': 2
+        })
+
+    def test_voters_fields_selection(self):
+        with self.assertNumQueries(3):
+            response = self.client.get(f'/api/feature/{self.features[0].id}/voters/?fields=vote_type')
+        self.assertEqual(response.data['total_votes'], 2)
+        self.assertEqual(response.data['upvotes'], 2)
+        self.assertEqual(set(response.data['votes'][0]), {'id', 'vote_type'})
+
+
+class CompressionTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='author', password='pass123')
+        cls.feature = None
+        for i in range(10):
+            cls.feature = Feature.objects.create(
+                title=f'Feature {i}', description='A fairly long description. ' * 10, author=cls.user
+            )
+        Vote.objects.create(user=cls.user, feature=cls.feature, vote_type=Vote.UPVOTE)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_gzip_negotiated(self):
+        response = self.client.get('/api/features/', HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        data = json.loads(gzip.decompress(response.content))
+        self.assertEqual(data['count'], 10)
+
+    def test_small_responses_not_compressed(self):
+        response = self.client.get(f'/api/feature/{self.feature.id}/?fields=title',
+                                   HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_choose_encoding(self):
+        available = {'zstd': None, 'br': None, 'gzip': None}
+        self.assertEqual(choose_encoding('gzip, br', available), 'br')
+        self.assertEqual(choose_encoding('gzip;q=1.0, br;q=0.5', available), 'gzip')
+        self.assertEqual(choose_encoding('*, zstd;q=0', available), 'br')
+        self.assertIsNone(choose_encoding('identity', available))
+        self.assertIsNone(choose_encoding('', available))
+
+    def test_streamed_voters_compressed(self):
+        response = self.client.get(f'/api/feature/{self.feature.id}/voters/?stream=true',
+                                   HTTP_ACCEPT_ENCODING='gzip')
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        data = json.loads(gzip.decompress(b''.join(response.streaming_content)))
+        self.assertEqual(data['total_votes'], 1)
+        self.assertEqual(data['votes'][0]['user']['username'], 'author')
+
+    def test_streamed_voters_match_buffered(self):
+        for i in range(4):
+            voter = User.objects.create(username=f'voter{i}')
+            Vote.objects.create(user=voter, feature=self.feature, vote_type=Vote.DOWNVOTE)
+        url = f'/api/feature/{self.feature.id}/voters/'
+
+        with mock.patch.object(FeatureVotersView, 'stream_batch_size', 2):
+            buffered = self.client.get(url).json()
+            streamed = json.loads(b''.join(self.client.get(url + '?stream=true').streaming_content))
+        self.assertEqual(streamed, buffered)
+
+    def test_compact_list_format(self):
+        response = self.client.get('/api/features/?format=compact&fields=title,total_score')
+        self.assertEqual(response['Content-Type'], 'application/vnd.featurevoting.compact+json')
+        data = response.json()
+        self.assertNotIn('results', data)
+        self.assertEqual(set(data['columns']), {'id', 'title', 'total_score'})
+        self.assertEqual(len(data['columns']['title']), 10)
+
+
+@override_settings(FEED_SNAPSHOT_ENABLED=True, FEED_SNAPSHOT_MAX_AGE=60)
+class FeedSnapshotTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='author', password='pass123')
+        self.token = RefreshToken.for_user(self.user).access_token
+        self.features = [
+            Feature.objects.create(title=f'Feature {i}', description='Description', author=self.user)
+            for i in range(25)
+        ]
+        Vote.objects.create(user=self.user, feature=self.features[3], vote_type=Vote.UPVOTE)
+
+    def test_snapshot_matches_live_response(self):
+        live = self.client.get('/api/features/?sort=score&page=2').json()
+        build_snapshots(pages=2)
+
+        response = self.client.get('/api/features/?sort=score&page=2')
+        self.assertIn('X-Feed-Snapshot-Age', response)
+        self.assertEqual(response.json(), live)
+
+    def test_snapshot_served_without_feature_queries(self):
+        build_snapshots(pages=1)
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/features/')
+        self.assertEqual(response.json()['count'], 25)
+
+    def test_user_vote_overlaid(self):
+        build_snapshots(pages=1)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        response = self.client.get('/api/features/?sort=score')
+        self.assertIn('X-Feed-Snapshot-Age', response)
+        first = response.json()['results'][0]
+        self.assertEqual(first['id'], str(self.features[3].id))
+        self.assertEqual(first['user_vote'], 'upvote')
+
+    def test_falls_back_to_live_query(self):
+        build_snapshots(pages=1)
+        # Beyond the snapshot, or with parameters the snapshot can't honour
+        self.assertNotIn('X-Feed-Snapshot-Age', self.client.get('/api/features/?page=2'))
+        self.assertNotIn('X-Feed-Snapshot-Age', self.client.get('/api/features/?fields=title'))
+
+        # A clean snapshot is served at any age, a dirty one only within FEED_SNAPSHOT_MAX_AGE
+        FeedSnapshot.objects.update(built_at=timezone.now() - timedelta(seconds=120))
+        self.assertIn('X-Feed-Snapshot-Age', self.client.get('/api/features/'))
+        FeedSnapshot.objects.update(dirty=True)
+        self.assertNotIn('X-Feed-Snapshot-Age', self.client.get('/api/features/'))
+
+    def test_writes_mark_snapshots_dirty(self):
+        build_snapshots(pages=1)
+        self.assertEqual(boards_needing_rebuild(), [])
+        # Age alone doesn't call for a rebuild
+        FeedSnapshot.objects.update(built_at=timezone.now() - timedelta(days=1))
+        self.assertEqual(boards_needing_rebuild(), [])
+
+        Vote.objects.create(user=self.user, feature=self.features[0], vote_type=Vote.DOWNVOTE)
+        self.assertTrue(FeedSnapshot.objects.filter(dirty=True).exists())
+        self.assertEqual(boards_needing_rebuild(), [self.features[0].board_id])
+
+
+class SoftDeleteArchiveTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='author', password='pass123')
+        self.token = RefreshToken.for_user(self.user).access_token
+        self.feature = Feature.objects.create(title='Gone', description='Description', author=self.user)
+        self.kept = Feature.objects.create(title='Kept', description='Description', author=self.user)
+        self.vote = Vote.objects.create(user=self.user, feature=self.feature, vote_type=Vote.UPVOTE)
+        Vote.objects.create(user=self.user, feature=self.kept, vote_type=Vote.UPVOTE)
+
+    def test_delete_hides_feature(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        response = self.client.delete(f'/api/feature/{self.feature.id}/')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+        self.assertFalse(Feature.objects.filter(pk=self.feature.pk).exists())
+        self.assertIsNotNone(Feature.all_objects.get(pk=self.feature.pk).deleted_at)
+        self.assertEqual(self.client.get(f'/api/feature/{self.feature.id}/').status_code,
+                         status.HTTP_404_NOT_FOUND)
+        # Votes still resolve their soft-deleted feature
+        self.assertEqual(Vote.objects.get(pk=self.vote.pk).feature.title, 'Gone')
+
+    def test_archive_moves_long_deleted_features(self):
+        self.feature.soft_delete()
+        Feature.all_objects.filter(pk=self.feature.pk).update(deleted_at=timezone.now() - timedelta(days=40))
+
+        features, votes = archive_deleted_features(timezone.now() - timedelta(days=30), batch_size=1)
+        self.assertEqual((features, votes), (1, 1))
+
+        self.assertFalse(Feature.all_objects.filter(pk=self.feature.pk).exists())
+        self.assertFalse(Vote.objects.filter(feature_id=self.feature.pk).exists())
+        archived = ArchivedFeature.objects.get(pk=self.feature.pk)
+        self.assertEqual(archived.votes.get().vote_type, Vote.UPVOTE)
+        self.assertTrue(Feature.objects.filter(pk=self.kept.pk).exists())
+
+    def test_archive_logs_one_change_per_feature(self):
+        voters = [User.objects.create_user(username=f'voter{n}', password='pass123') for n in range(5)]
+        for voter in voters:
+            vote = Vote.objects.create(user=voter, feature=self.feature, vote_type=Vote.UPVOTE)
+        FlaggedVote.objects.create(vote=vote, reason='feature_burst')
+        self.feature.soft_delete()
+        Feature.all_objects.filter(pk=self.feature.pk).update(deleted_at=timezone.now() - timedelta(days=40))
+        before = FeatureChange.objects.count()
+
+        self.assertEqual(archive_deleted_features(timezone.now() - timedelta(days=30)), (1, 6))
+        self.assertEqual(FeatureChange.objects.count() - before, 1)
+        self.assertFalse(FlaggedVote.objects.exists())
+
+    def test_archive_skips_recent_deletes(self):
+        self.feature.soft_delete()
+        self.assertEqual(archive_deleted_features(timezone.now() - timedelta(days=30)), (0, 0))
+        self.assertTrue(Feature.all_objects.filter(pk=self.feature.pk).exists())
+
+
+class BoardTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='author', password='pass123')
+        self.token = RefreshToken.for_user(self.user).access_token
+        self.board = Board.objects.create(slug='acme', name='Acme')
+        self.acme_feature = Feature.objects.create(title='Acme only', description='Description',
+                                                   author=self.user, board=self.board)
+        self.default_feature = Feature.objects.create(title='Default', description='Description',
+                                                      author=self.user)
+
+    def test_boards_are_isolated(self):
+        titles = [f['title'] for f in self.client.get('/api/boards/acme/features/').data['results']]
+        self.assertEqual(titles, ['Acme only'])
+        titles = [f['title'] for f in self.client.get('/api/features/').data['results']]
+        self.assertEqual(titles, ['Default'])
+
+        self.assertEqual(self.client.get(f'/api/feature/{self.acme_feature.id}/').status_code,
+                         status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get(f'/api/boards/acme/feature/{self.acme_feature.id}/').status_code,
+                         status.HTTP_200_OK)
+
+    def test_unknown_board_404(self):
+        self.assertEqual(self.client.get('/api/boards/nope/features/').status_code,
+                         status.HTTP_404_NOT_FOUND)
+
+    def test_create_and_vote_on_board(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        response = self.client.post('/api/boards/acme/feature/', {
+            'title': 'New Acme Feature',
+            'description': 'New description'
+        })
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        feature = Feature.objects.get(pk=response.data['id'])
+        self.assertEqual(feature.board, self.board)
+        # The creator's automatic upvote is scoped to the same board
+        self.assertEqual(feature.votes.get().board, self.board)
+
+        response = self.client.post(f'/api/boards/acme/feature/{self.acme_feature.id}/vote/',
+                                    {'vote_type': 'upvote'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Vote.objects.get(feature=self.acme_feature).board, self.board)
+
+    @override_settings(FEED_SNAPSHOT_ENABLED=True)
+    def test_snapshots_per_board(self):
+        build_snapshots()
+        Vote.objects.create(user=self.user, feature=self.acme_feature, vote_type=Vote.UPVOTE)
+        self.assertEqual(boards_needing_rebuild(), [self.board.pk])
+
+        response = self.client.get('/api/boards/acme/features/')
+        self.assertIn('X-Feed-Snapshot-Age', response)
+        self.assertEqual([f['title'] for f in response.json()['results']], ['Acme only'])
+
+
+class MyVotesTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='voter', password='pass123')
+        cls.other = User.objects.create_user(username='other', password='pass123')
+        cls.features = [
+            Feature.objects.create(title=f'Feature {i}', description='Description', author=cls.other)
+            for i in range(5)
+        ]
+        for i, feature in enumerate(cls.features):
+            Vote.objects.create(user=cls.user, feature=feature, vote_type=Vote.UPVOTE if i % 2 else Vote.DOWNVOTE)
+        Vote.objects.create(user=cls.other, feature=cls.features[0], vote_type=Vote.UPVOTE)
+
+    def setUp(self):
+        cache.clear()
+        self.token = RefreshToken.for_user(self.user).access_token
+
+    def test_requires_auth(self):
+        self.assertEqual(self.client.get('/api/me/votes/').status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self.client.get('/api/me/votes/ids/').status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_vote_history_cursor_paginated(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        # JWT user lookup plus one joined query for the page
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/me/votes/?page_size=3')
+        self.assertEqual(len(response.data['results']), 3)
+        first = response.data['results'][0]
+        self.assertEqual(first['feature']['title'], 'Feature 4')
+        self.assertEqual(first['vote_type'], 'downvote')
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual([v['feature']['title'] for v in response.data['results']], ['Feature 1', 'Feature 0'])
+        self.assertIsNone(response.data['next'])
+
+    def test_vote_ids(self):
+        self.features[2].soft_delete()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        response = self.client.get('/api/me/votes/ids/')
+        self.assertEqual(response.data, {
+            str(self.features[0].id): 'downvote',
+            str(self.features[1].id): 'upvote',
+            str(self.features[3].id): 'upvote',
+            str(self.features[4].id): 'downvote',
+        })
+
+
+class SyncTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='voter', password='pass123')
+        self.other = User.objects.create_user(username='other', password='pass123')
+        self.token = RefreshToken.for_user(self.user).access_token
+        self.features = [
+            Feature.objects.create(title=f'Feature {i}', description='Description', author=self.other)
+            for i in range(3)
+        ]
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+
+    def sync(self, token=None, query=''):
+        url = f'/api/sync/?since={token}{query}' if token else f'/api/sync/?{query}'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_initial_sync_resets(self):
+        data = self.sync()
+        self.assertTrue(data['reset'])
+        self.assertEqual(data['features'], [])
+        self.assertFalse(self.sync(data['token'])['reset'])
+
+    def test_returns_only_changed_features(self):
+        token = self.sync()['token']
+        self.assertEqual(self.sync(token)['features'], [])
+
+        Vote.objects.create(user=self.other, feature=self.features[1], vote_type=Vote.UPVOTE)
+        self.features[2].soft_delete()
+        data = self.sync(token, '&fields=title,total_score')
+
+        self.assertEqual(data['features'], [
+            {'id': str(self.features[1].id), 'title': 'Feature 1', 'total_score': 1},
+        ])
+        self.assertEqual(data['deleted'], [str(self.features[2].id)])
+        self.assertEqual(data['votes'], {})
+
+        # The new token moves past those changes
+        self.assertEqual(self.sync(data['token'])['features'], [])
+
+    def test_response_shape_does_not_depend_on_auth(self):
+        self.client.credentials()
+        data = self.sync()
+        self.assertEqual(data['votes'], {})
+        Vote.objects.create(user=self.other, feature=self.features[0], vote_type=Vote.UPVOTE)
+        self.assertEqual(self.sync(data['token'])['votes'], {})
+
+    def test_reports_callers_vote_changes(self):
+        token = self.sync()['token']
+        vote = Vote.objects.create(user=self.user, feature=self.features[0], vote_type=Vote.UPVOTE)
+        Vote.objects.create(user=self.user, feature=self.features[1], vote_type=Vote.DOWNVOTE)
+        vote.delete()
+
+        data = self.sync(token)
+        self.assertEqual(data['votes'], {str(self.features[0].id): None, str(self.features[1].id): 'downvote'})
+
+    @override_settings(SYNC_MAX_CHANGES=2)
+    def test_large_change_sets_are_paged(self):
+        token = self.sync()['token']
+        for feature in self.features:
+            Vote.objects.create(user=self.other, feature=feature, vote_type=Vote.UPVOTE)
+
+        data = self.sync(token)
+        self.assertTrue(data['has_more'])
+        self.assertEqual(len(data['features']), 2)
+        data = self.sync(data['token'])
+        self.assertFalse(data['has_more'])
+        self.assertEqual(len(data['features']), 1)
+
+    @override_settings(SYNC_OVERLAP_SECONDS=5)
+    def test_rereads_changes_that_commit_out_of_order(self):
+        Vote.objects.create(user=self.other, feature=self.features[0], vote_type=Vote.UPVOTE)
+        Vote.objects.create(user=self.other, feature=self.features[1], vote_type=Vote.UPVOTE)
+        # The vote on feature 0 got its id first but its transaction commits after the token is issued
+        late = FeatureChange.objects.filter(feature_id=self.features[0].id).values().latest('id')
+        FeatureChange.objects.filter(pk=late['id']).delete()
+        token = self.sync()['token']
+        FeatureChange.objects.create(**late)
+
+        data = self.sync(token, '&fields=title')
+        self.assertIn({'id': str(self.features[0].id), 'title': 'Feature 0'}, data['features'])
+
+    def test_pruned_token_resets(self):
+        token = self.sync()['token']
+        FeatureChange.objects.all().delete()
+        self.assertTrue(self.sync(token)['reset'])
+
+    def test_invalid_token(self):
+        self.assertEqual(self.client.get('/api/sync/?since=garbage').status_code,
+                         status.HTTP_400_BAD_REQUEST)
+        board = Board.objects.create(slug='acme', name='Acme')
+        token = self.sync()['token']
+        self.assertEqual(self.client.get(f'/api/boards/{board.slug}/sync/?since={token}').status_code,
+                         status.HTTP_400_BAD_REQUEST)
+
+
+class ScaleTest(APITestCase):
+    """Feed and vote endpoints against a few thousand rows built with the bulk factories"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users, cls.features, cls.votes = create_vote_graph(users=100, features=1000, votes_per_feature=5)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_graph_size(self):
+        self.assertEqual(Feature.objects.count(), 1000)
+        self.assertEqual(Vote.objects.count(), 5000)
+        self.assertFalse(Vote.objects.exclude(board_id=F('feature__board_id')).exists())
+
+    def test_list_query_count_constant_across_pages(self):
+        token = RefreshToken.for_user(self.users[1]).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        for page in (1, 10, 50):
+            # JWT user lookup, pagination count and the page itself
+            with self.assertNumQueries(3):
+                response = self.client.get(f'/api/features/?sort=score&page={page}')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def page_query_plan(self, url):
+        """SQLite's plan for the last query a GET made, which loads the page"""
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + queries.captured_queries[-1]['sql'])
+            return ' / '.join(row[-1] for row in cursor.fetchall())
+
+    def test_recent_feed_does_not_aggregate_whole_board(self):
+        # Query counts can't see this: an aggregate over every feature and vote
+        # is still one query, just one that grows with the board
+        plan = self.page_query_plan('/api/features/?page=2')
+        self.assertNotIn('TEMP B-TREE', plan)
+        self.assertIn('COVERING INDEX vote_feature_type_idx', plan)
+
+    def test_score_feed_counts_from_covering_index(self):
+        plan = self.page_query_plan('/api/features/?sort=score')
+        self.assertIn('COVERING INDEX vote_feature_type_idx', plan)
+
+    def test_score_order_matches_votes(self):
+        expected = {}
+        for vote in self.votes:
+            expected[vote.feature_id] = expected.get(vote.feature_id, 0) + vote.vote_type
+
+        response = self.client.get('/api/features/?sort=score&fields=total_score')
+        results = response.data['results']
+        scores = [item['total_score'] for item in results]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+        self.assertEqual(scores[0], max(expected.values()))
+        for item in results:
+            self.assertEqual(item['total_score'], expected[UUID(item['id'])])
+
+
+@override_settings(MIDDLEWARE=settings_api.MIDDLEWARE)
+class ApiProfileTest(APITestCase):
+    """The API works with config.settings_api's reduced middleware stack"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='voter', password='pass123')
+        cls.feature = Feature.objects.create(title='Feature', description='Description', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_read_and_vote_without_session_middleware(self):
+        self.assertEqual(self.client.get('/api/features/').status_code, status.HTTP_200_OK)
+        token = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        response = self.client.post(f'/api/feature/{self.feature.id}/vote/', {'vote_type': 'upvote'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+
+class WebhookStandIn:
+    """A local HTTP endpoint that records webhook POSTs and answers with `status`"""
+
+    def __init__(self):
+        self.requests = []
+        self.status = 200
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers['Content-Length']))
+                stand_in.requests.append((dict(self.headers), json.loads(body), body))
+                self.send_response(stand_in.status)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_port}/hook'
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@override_settings(WEBHOOK_SUMMARY_WINDOW=0, WEBHOOK_BACKOFF_BASE=10, WEBHOOK_CIRCUIT_THRESHOLD=2)
+class WebhookTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='author', password='pass123')
+        cls.feature = Feature.objects.create(title='Popular', description='Description', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.stand_in = WebhookStandIn()
+        self.addCleanup(self.stand_in.close)
+        self.webhook = Webhook.objects.create(
+            board_id=self.feature.board_id, url=self.stand_in.url, secret='s3cret',
+            events=['feature.created', 'feature.threshold', 'feature.votes'], thresholds=[10, 25, 1000],
+        )
+
+    def test_writes_record_outbox_events(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+        response = self.client.post('/api/feature/', {'title': 'New', 'description': 'Description'})
+        self.client.post(f'/api/feature/{self.feature.id}/vote/', {'vote_type': 'upvote'})
+        self.client.post(f'/api/feature/{self.feature.id}/vote/', {'vote_type': 'downvote'})
+        self.client.delete(f'/api/feature/{self.feature.id}/vote/')
+
+        events = list(OutboxEvent.objects.order_by('id').values_list('event_type', 'feature_id', 'payload'))
+        created = Feature.objects.get(pk=response.data['id']).pk
+        self.assertEqual(events[0][:2], (OutboxEvent.FEATURE_CREATED, created))
+        # The author's automatic upvote
+        self.assertEqual(events[1], (OutboxEvent.VOTE_CHANGED, created,
+                                     {'user_id': self.user.pk, 'vote_type': 'upvote', 'previous': None}))
+        self.assertEqual([payload for _, _, payload in events[2:]], [
+            {'user_id': self.user.pk, 'vote_type': 'upvote', 'previous': None},
+            {'user_id': self.user.pk, 'vote_type': 'downvote', 'previous': 'upvote'},
+            {'user_id': self.user.pk, 'vote_type': None, 'previous': 'downvote'},
+        ])
+
+    def test_votes_aggregate_into_thresholds_and_one_summary(self):
+        voters = create_users(30, prefix='voter')
+        create_votes(voters, [self.feature], votes_per_feature=30, upvote_ratio=1)
+        for voter in voters:
+            record_vote_event(self.feature, voter, Vote.UPVOTE)
+
+        # Two batches: the second folds into the first batch's pending summary
+        self.assertEqual(plan(batch_size=20), 20)
+        self.assertEqual(plan(batch_size=20), 10)
+        self.assertFalse(OutboxEvent.objects.exists())
+        self.assertEqual(WebhookDelivery.objects.count(), 3)
+
+        self.assertEqual(deliver(), (3, 0))
+        received = {body['event']: (headers, body, raw) for headers, body, raw in self.stand_in.requests
+                    if body['event'] != 'feature.threshold'}
+        thresholds = sorted(body['threshold'] for _, body, _ in self.stand_in.requests
+                            if body['event'] == 'feature.threshold')
+        self.assertEqual(thresholds, [10, 25])
+        headers, summary, raw = received['feature.votes']
+        self.assertEqual((summary['votes'], summary['upvote_count']), (30, 30))
+        self.assertEqual(headers['X-Webhook-Signature'],
+                         'sha256=' + hmac.new(b's3cret', raw, hashlib.sha256).hexdigest())
+
+        # Thresholds already reached never fire again
+        record_vote_event(self.feature, voters[0], Vote.UPVOTE)
+        plan()
+        self.assertFalse(WebhookDelivery.objects.filter(status='pending', event_type='feature.threshold').exists())
+
+    def test_failed_delivery_retried_with_backoff(self):
+        self.stand_in.status = 503
+        # Just the creation, not the summary of the author's automatic upvote
+        Webhook.objects.update(events=['feature.created'])
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+        self.client.post('/api/feature/', {'title': 'New', 'description': 'Description'})
+        plan()
+
+        self.assertEqual(deliver(), (0, 1))
+        delivery = WebhookDelivery.objects.get()
+        self.assertEqual((delivery.status, delivery.attempts, delivery.last_error), ('pending', 1, 'HTTP 503'))
+        self.assertGreater(delivery.next_attempt_at, timezone.now() + timedelta(seconds=4))
+        # Not due yet, so nothing is sent
+        self.assertEqual(deliver(), (0, 0))
+        self.assertEqual(len(self.stand_in.requests), 1)
+
+    def test_circuit_breaker_opens_and_recovers(self):
+        self.stand_in.status = 500
+        for i in range(3):
+            WebhookDelivery.objects.create(webhook=self.webhook, event_type='feature.created',
+                                           feature_id=self.feature.pk, payload={'n': i})
+        self.assertEqual(deliver(), (0, 3))
+        self.webhook.refresh_from_db()
+        self.assertIsNotNone(self.webhook.circuit_open_until)
+
+        # While open nothing is attempted, even once the retries are due
+        WebhookDelivery.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(deliver(), (0, 0))
+
+        # After the cooldown a single trial goes out and closes the circuit
+        self.stand_in.status = 200
+        Webhook.objects.update(circuit_open_until=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(deliver(), (1, 0))
+        self.webhook.refresh_from_db()
+        self.assertEqual((self.webhook.consecutive_failures, self.webhook.circuit_open_until), (0, None))
+        self.assertEqual(deliver(), (2, 0))
+
+
+@override_settings(ABUSE_FEATURE_BURST=20, ABUSE_ACCOUNT_BURST=10)
+class AbuseTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+
+    def stream(self, count, feature_id, start, new_accounts, ips, user_offset=0, seconds=60):
+        account_age = timedelta(minutes=5) if new_accounts else timedelta(days=90)
+        return [
+            VoteEvent(f'{feature_id}-{user_offset + n}', feature_id, user_offset + n,
+                      start + timedelta(seconds=seconds * n / count),
+                      start + timedelta(seconds=seconds * n / count) - account_age,
+                      ips[n % len(ips)], f'agent-{n % len(ips)}')
+            for n in range(count)
+        ]
+
+    def test_hyperloglog_estimate(self):
+        sketch = HyperLogLog()
+        for n in range(5000):
+            sketch.add(f'10.0.{n // 256}.{n % 256}')
+        self.assertAlmostEqual(sketch.count(), 5000, delta=750)
+        other = HyperLogLog()
+        for n in range(4000, 6000):
+            other.add(f'10.0.{n // 256}.{n % 256}')
+        sketch.update(other)
+        self.assertAlmostEqual(sketch.count(), 6000, delta=900)
+
+    def test_polling_recent_votes_reads_the_created_index(self):
+        with CaptureQueriesContext(connection) as queries:
+            list(vote_events(Vote.objects.filter(created_at__gte=timezone.now() - timedelta(seconds=5))))
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + queries.captured_queries[-1]['sql'])
+            plan = ' / '.join(row[-1] for row in cursor.fetchall())
+        self.assertIn('features_vote USING INDEX vote_created_idx (created_at>?)', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_burst_from_new_accounts_flagged(self):
+        start = timezone.now()
+        organic = self.stream(100, 'organic', start, False, [f'10.1.0.{n}' for n in range(100)], 1000)
+        scripted = self.stream(60, 'target', start, True, ['192.0.2.1', '192.0.2.2'])
+        analyzer = VoteAnalyzer()
+        flagged = {}
+        for event in sorted(organic + scripted, key=lambda event: event.timestamp):
+            flagged.update(analyzer.process(event))
+
+        # Including the votes cast before the burst was detected
+        self.assertEqual(set(flagged), {event.vote_id for event in scripted})
+        self.assertEqual(set(flagged.values()), {'feature_burst'})
+
+    def test_popular_feature_not_flagged(self):
+        start = timezone.now()
+        established = start - timedelta(days=365)
+        # Unique IPs but only the app's three agents; then distinct agents behind one proxy
+        app = [VoteEvent(f'app-{n}', 'popular', n, start + timedelta(seconds=n / 2), established,
+                         f'10.2.{n // 256}.{n % 256}', f'FeatureVoting-iOS/2.{n % 3}') for n in range(600)]
+        proxy = [VoteEvent(f'proxy-{n}', 'office', n, start + timedelta(seconds=n / 2), established,
+                           '198.51.100.1', f'Browser/{n}') for n in range(600)]
+        analyzer = VoteAnalyzer()
+        flags = [flag for event in sorted(app + proxy, key=lambda event: event.timestamp)
+                 for flag in analyzer.process(event)]
+        self.assertEqual(flags, [])
+
+    def test_burst_on_popular_feature_spares_shared_sources(self):
+        start = timezone.now()
+        organic = [VoteEvent(f'organic-{n}', 'popular', n, start + timedelta(seconds=n / 5),
+                             start - timedelta(days=365), f'10.2.{n // 256}.{n % 256}', f'FeatureVoting-iOS/2.{n % 3}')
+                   for n in range(300)]
+        scripted = self.stream(200, 'popular', start, True, ['192.0.2.1', '192.0.2.2'], 1000)
+        analyzer = VoteAnalyzer()
+        flagged = {}
+        for event in sorted(organic + scripted, key=lambda event: event.timestamp):
+            flagged.update(analyzer.process(event))
+
+        self.assertFalse(set(flagged) & {event.vote_id for event in organic})
+        self.assertGreater(len(flagged), 180)
+
+    def test_account_burst_flags_excess_votes(self):
+        start = timezone.now()
+        events = [
+            VoteEvent(n, f'feature-{n}', 1, start + timedelta(seconds=n), start - timedelta(days=90), '10.0.0.1', 'ua')
+            for n in range(15)
+        ]
+        analyzer = VoteAnalyzer()
+        flags = [flag for event in events for flag in analyzer.process(event)]
+        self.assertEqual(flags, [(n, 'account_burst') for n in range(10, 15)])
+
+    def test_replay_excludes_flagged_votes_from_score(self):
+        author = User.objects.create_user(username='author', password='pass123')
+        organic, target = (Feature.objects.create(title=title, description='Description', author=author)
+                           for title in ('Organic', 'Target'))
+        established = create_users(25, prefix='established')
+        User.objects.filter(pk__in=[user.pk for user in established]).update(
+            date_joined=timezone.now() - timedelta(days=90))
+        # Like votes cast before IPs were recorded: no source signal, which alone is not suspicious
+        create_votes(established, [organic], votes_per_feature=25, upvote_ratio=1)
+        fresh = create_users(30, prefix='fresh')
+        create_votes(fresh, [target], votes_per_feature=30, upvote_ratio=1)
+
+        call_command('analyze_votes', stdout=StringIO())
+        self.assertEqual(FlaggedVote.objects.filter(vote__feature=target).count(), 30)
+        self.assertFalse(FlaggedVote.objects.filter(vote__feature=organic).exists())
+        self.assertEqual(Vote.objects.count(), 55)
+
+        scores = {item['title']: item['total_score']
+                  for item in self.client.get('/api/features/?fields=title,total_score').data['results']}
+        self.assertEqual(scores, {'Organic': 25, 'Target': 30})
+        with override_settings(ABUSE_EXCLUDE_FLAGGED=True):
+            cache.clear()
+            scores = {item['title']: item['total_score']
+                      for item in self.client.get('/api/features/?fields=title,total_score').data['results']}
+            self.assertEqual(scores, {'Organic': 25, 'Target': 0})
+            self.assertEqual(target.upvote_count, 0)
+
+    def test_vote_records_client_signals(self):
+        user = User.objects.create_user(username='voter', password='pass123')
+        feature = Feature.objects.create(title='Feature', description='Description', author=user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+        self.client.post(f'/api/feature/{feature.id}/vote/', {'vote_type': 'upvote'},
+                         REMOTE_ADDR='203.0.113.7', HTTP_USER_AGENT='TestBrowser/1.0')
+        vote = Vote.objects.get()
+        self.assertEqual((vote.ip_address, vote.user_agent), ('203.0.113.7', 'TestBrowser/1.0'))
+
+    @override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'NUM_PROXIES': 1})
+    def test_vote_ip_resolved_through_proxy(self):
+        user = User.objects.create_user(username='voter', password='pass123')
+        feature = Feature.objects.create(title='Feature', description='Description', author=user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+        self.client.post(f'/api/feature/{feature.id}/vote/', {'vote_type': 'upvote'},
+                         REMOTE_ADDR='10.0.0.2', HTTP_X_FORWARDED_FOR='198.51.100.9, 203.0.113.7')
+        self.assertEqual(Vote.objects.get().ip_address, '203.0.113.7')
+
+
+class SchemaTest(APITestCase):
+    def test_schema_served_with_etag(self):
+        response = self.client.get('/api/schema/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/vnd.oai.openapi+json')
+        self.assertIn('max-age=', response['Cache-Control'])
+
+        not_modified = self.client.get('/api/schema/', HTTP_IF_NONE_MATCH=f"W/{response['ETag']}")
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_performance_metadata(self):
+        schema = json.loads(self.client.get('/api/schema/').content)
+        operations = [operation for path in schema['paths'].values() for operation in path.values()]
+        self.assertEqual(len({operation['operationId'] for operation in operations}), len(operations))
+
+        feed = schema['paths']['/api/features/']['get']['x-performance']
+        self.assertEqual(set(feed), {'pagination', 'query_budget', 'throttles', 'cacheable'})
+        self.assertEqual(feed['pagination'], {'type': 'page', 'page_size': 20, 'max_page_size': None,
+                                              'page_size_param': None})
+        self.assertFalse(feed['cacheable'])
+        with override_settings(FEED_SNAPSHOT_ENABLED=True):
+            schema = json.loads(self.client.get('/api/schema/').content)
+        feed = schema['paths']['/api/features/']['get']
+        self.assertTrue(feed['x-performance']['cacheable'])
+        parameters = {parameter['name']: parameter for parameter in feed['parameters']}
+        self.assertEqual(parameters['format']['schema']['enum'], ['json', 'compact'])
+        self.assertEqual(parameters['description_length']['examples'],
+                         {'omit=author&description_length=80': {'value': 80}})
+        self.assertIn('since', {parameter['name'] for parameter in schema['paths']['/api/sync/']['get']['parameters']})
+        history = schema['paths']['/api/me/votes/']['get']['x-performance']
+        self.assertEqual((history['pagination']['type'], history['pagination']['max_page_size']), ('cursor', 100))
+        vote = schema['paths']['/api/feature/{id}/vote/']['post']
+        self.assertEqual({throttle['scope'] for throttle in vote['x-performance']['throttles']}, {'vote', 'write_ip'})
+        self.assertEqual(vote['requestBody']['content']['application/json']['example'], {'vote_type': 'upvote'})
+        login = schema['paths']['/api/auth/login/']['post']['x-performance']
+        self.assertEqual([throttle['scope'] for throttle in login['throttles']], ['login_ip', 'login_username'])
+
+    def test_examples_replay_within_budget(self):
+        out = StringIO()
+        call_command('replay_schema_examples', runs=1, features=20, boards=True, strict=True, stdout=out)
+        self.assertIn('POST /api/auth/login/', out.getvalue())
+        self.assertIn('GET /api/features/ [fields=title,total_score,user_vote&format=compact]', out.getvalue())
+        # Nothing the replay did is kept
+        self.assertFalse(Feature.objects.exists())
+        self.assertFalse(User.objects.exists())
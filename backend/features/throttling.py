@@ -0,0 +1,118 @@
+"""
+Sliding-window rate limiting for the write-heavy feature endpoints.
+
+DRF's stock SimpleRateThrottle stores a list of every request timestamp and
+rewrites it on each hit, which gets expensive for busy clients. These
+throttles keep two integer counters per client instead (the current and the
+previous fixed window) and estimate the sliding-window count by weighting
+the previous window by how much of it still overlaps. Counters are updated
+with cache.add()/incr(), which are atomic on the shared Redis and Memcached
+backends (CACHE_URL), and nothing touches the database. Without CACHE_URL the
+cache is a per-process LocMemCache, so each worker enforces the rate on its own.
+
+Rates live in REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'] under each scope.
+"""
+import ipaddress
+
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle, SimpleRateThrottle
+
+
+class SlidingWindowRateThrottle(SimpleRateThrottle):
+    cache_format = 'throttle:%(scope)s:%(ident)s'
+
+    def get_rate(self):
+        # Read live settings so rate changes (and override_settings) apply
+        return api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        window = int(self.now // self.duration)
+        self.elapsed = (self.now % self.duration) / self.duration
+        current_key = f'{self.key}:{window}'
+
+        # Counters must outlive the window after theirs, where they are the "previous" one
+        self.cache.add(current_key, 0, timeout=self.duration * 2)
+        try:
+            self.count = self.cache.incr(current_key)
+        except ValueError:
+            # Evicted between add() and incr(); start the window again
+            self.cache.set(current_key, 1, timeout=self.duration * 2)
+            self.count = 1
+        self.previous = self.cache.get(f'{self.key}:{window - 1}', 0)
+
+        if self.previous * (1 - self.elapsed) + self.count <= self.num_requests:
+            return True
+
+        # Rejected requests don't consume quota
+        self.cache.decr(current_key)
+        self.count -= 1
+        return False
+
+    def wait(self):
+        """Seconds until the estimated window count leaves room for one more request"""
+        remaining = self.duration * (1 - self.elapsed)
+        room = self.num_requests - self.count - 1
+        if room < 0 or not self.previous:
+            return remaining
+        # The previous window's weight decays linearly; solve for when it fits
+        return max(0.0, remaining - self.duration * room / self.previous)
+
+
+class UserOrIPRateThrottle(SlidingWindowRateThrottle):
+    """Keyed on the user for authenticated requests, otherwise the client IP"""
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = f'user:{request.user.pk}'
+        else:
+            ident = f'ip:{self.get_ident(request)}'
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+
+class VoteRateThrottle(UserOrIPRateThrottle):
+    scope = 'vote'
+
+
+class FeatureCreateRateThrottle(UserOrIPRateThrottle):
+    scope = 'feature_create'
+
+
+class WriteIPRateThrottle(SlidingWindowRateThrottle):
+    """Caps writes per IP across all accounts, so a script can't just rotate users"""
+    scope = 'write_ip'
+
+    def get_cache_key(self, request, view):
+        if request.method in ('GET', 'HEAD', 'OPTIONS'):
+            return None
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+class FeedAnonRateThrottle(SlidingWindowRateThrottle):
+    """Limits anonymous feed reads per IP; authenticated readers are not limited"""
+    scope = 'feed_anon'
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return None
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+def client_ip(request):
+    """
+    The client address the throttles key on: X-Forwarded-For as trusted by
+    NUM_PROXIES, else REMOTE_ADDR. Without NUM_PROXIES DRF returns the whole
+    forwarded chain, so take its first hop. None if it isn't an IP address.
+    """
+    ident = BaseThrottle().get_ident(request).split(',')[0].strip()
+    try:
+        return str(ipaddress.ip_address(ident))
+    except ValueError:
+        return None
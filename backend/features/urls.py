@@ -12,4 +12,11 @@ urlpatterns = [
     # Voting endpoints
     path('feature/<uuid:pk>/vote/', views.FeatureVoteView.as_view(), name='feature-vote'),
     path('feature/<uuid:pk>/voters/', views.FeatureVotersView.as_view(), name='feature-voters'),
+
+    # Current user's votes
+    path('me/votes/', views.MyVotesView.as_view(), name='my-votes'),
+    path('me/votes/ids/', views.MyVoteIdsView.as_view(), name='my-vote-ids'),
+
+    # Delta sync for mobile clients
+    path('sync/', views.SyncView.as_view(), name='sync'),
 ]
\ No newline at end of file
@@ -2,50 +2,171 @@ from rest_framework import status, permissions
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from rest_framework.exceptions import ValidationError
 from rest_framework.generics import ListAPIView, CreateAPIView, RetrieveUpdateDestroyAPIView
+from rest_framework.renderers import JSONRenderer
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from .models import Feature, Vote
-from .serializers import (FeatureSerializer, FeatureListSerializer,
+from config.schema import PerformanceSchema
+from .models import Board, Feature, OutboxEvent, Vote, get_default_board_id
+from .outbox import record_feature_event, record_vote_event
+from .renderers import CompactJSONRenderer
+from .snapshots import snapshot_response
+from .sync import RESET, changes_since, decode_token, encode_token
+from .pagination import VoteHistoryPagination
+from .serializers import (FeatureSerializer, FeatureListSerializer, UserVoteSerializer,
                          VoteSerializer, VoteActionSerializer)
+from .throttling import (FeatureCreateRateThrottle, FeedAnonRateThrottle,
+                         VoteRateThrottle, WriteIPRateThrottle, client_ip)
 
 
-class FeatureListView(ListAPIView):
+class BoardMixin:
+    """Scopes a view to the board in the URL (/api/boards/<slug>/...), or the default board"""
+
+    def get_board_id(self):
+        if not hasattr(self, '_board_id'):
+            slug = self.kwargs.get('board')
+            if slug is None:
+                self._board_id = get_default_board_id()
+            else:
+                self._board_id = get_object_or_404(Board.objects.values_list('pk', flat=True), slug=slug)
+        return self._board_id
+
+
+class FieldSelectionMixin:
+    """
+    Sparse GET responses: ?fields=a,b keeps only those fields, ?omit=a,b drops
+    them, and ?description_length=N truncates descriptions. 'id' is always
+    returned. Views also use the selection to narrow their queries.
+    """
+    selectable_fields = ()
+
+    def get_selected_fields(self):
+        """Return the set of requested field names, or None for all of them"""
+        params = self.request.query_params
+        if self.request.method != 'GET' or not (params.get('fields') or params.get('omit')):
+            return None
+
+        selected = set(self.selectable_fields)
+        if params.get('fields'):
+            selected = self._parse_field_list('fields')
+        if params.get('omit'):
+            selected -= self._parse_field_list('omit')
+        return selected | {'id'}
+
+    def _parse_field_list(self, param):
+        names = {name.strip() for name in self.request.query_params[param].split(',') if name.strip()}
+        unknown = names - set(self.selectable_fields)
+        if unknown:
+            raise ValidationError({param: f"Unknown field(s): {', '.join(sorted(unknown))}"})
+        return names
+
+    def get_description_length(self):
+        value = self.request.query_params.get('description_length')
+        if self.request.method != 'GET' or value is None:
+            return None
+        try:
+            length = int(value)
+        except ValueError:
+            length = 0
+        if length < 1:
+            raise ValidationError({'description_length': 'Must be a positive integer'})
+        return length
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.request is None:
+            # Schema generation inspects serializers without a request
+            return context
+        context['fields'] = self.get_selected_fields()
+        context['description_length'] = self.get_description_length()
+        return context
+
+
+class FeatureListView(BoardMixin, FieldSelectionMixin, ListAPIView):
     """List all features with pagination, sorted by score"""
     queryset = Feature.objects.all().order_by('-id')  # Most recent first, can be changed to score
     serializer_class = FeatureListSerializer
     permission_classes = [permissions.AllowAny]  # Allow public access to view features
+    throttle_classes = [FeedAnonRateThrottle]
+    renderer_classes = [JSONRenderer, CompactJSONRenderer]
+    selectable_fields = FeatureListSerializer.Meta.fields
+    # User and board lookups, the page count and the page itself
+    schema = PerformanceSchema(
+        query_budget=4,
+        cacheable='FEED_SNAPSHOT_ENABLED',
+        parameters={'sort': {'description': 'recent (default) or score',
+                             'schema': {'type': 'string', 'enum': ['recent', 'score']}}},
+        examples={'GET': [
+            {'sort': 'score'},
+            {'fields': 'title,total_score,user_vote', 'format': 'compact'},
+            {'omit': 'author', 'description_length': 80},
+        ]},
+    )
 
     def get_queryset(self):
-        queryset = Feature.objects.filter(status='active')
-
-        # Optional: Sort by different criteria (with input validation)
-        sort_by = self.request.query_params.get('sort', 'recent')
-        if sort_by == 'score':
-            # Note: This is not efficiently sortable in DB, would need denormalized score field
-            # For now, use Python sorting (not ideal for large datasets)
-            # Limit to prevent DoS on large datasets
-            features = list(queryset[:100])  # Limit for performance
-            features.sort(key=lambda f: f.total_score, reverse=True)
-            return features
-        elif sort_by == 'recent':
-            return queryset.order_by('-created_at')
-        else:
-            # Default to recent for any invalid sort parameter
-            return queryset.order_by('-created_at')
-
-
-class FeatureCreateView(CreateAPIView):
+        # Sort by 'recent' (default, also used for invalid values) or 'score'.
+        # feed() goes first so a score sort's aggregate counts are the ones for_fields() reuses.
+        queryset = Feature.objects.filter(board_id=self.get_board_id()).feed(
+            self.request.query_params.get('sort', 'recent')
+        )
+        return queryset.for_fields(
+            self.get_selected_fields(),
+            user=self.request.user,
+            description_length=self.get_description_length(),
+        )
+
+    def list(self, request, *args, **kwargs):
+        if settings.FEED_SNAPSHOT_ENABLED:
+            response = snapshot_response(request, self.paginator, self.get_board_id())
+            if response is not None:
+                return response
+        return super().list(request, *args, **kwargs)
+
+
+class FeatureCreateView(BoardMixin, CreateAPIView):
     """Create a new feature"""
     queryset = Feature.objects.all()
     serializer_class = FeatureSerializer
     permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [FeatureCreateRateThrottle, WriteIPRateThrottle]
+    # Includes the author's auto-upvote, the change log and both outbox events
+    schema = PerformanceSchema(query_budget=13, examples={
+        'POST': {'title': 'Dark mode', 'description': 'A dark theme for the dashboard'},
+    })
 
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            feature = serializer.save(board_id=self.get_board_id())
+            record_feature_event(OutboxEvent.FEATURE_CREATED, feature)
+            # The serializer's automatic upvote by the author, recorded after the feature itself
+            record_vote_event(feature, self.request.user, Vote.UPVOTE)
 
-class FeatureDetailView(RetrieveUpdateDestroyAPIView):
+
+class FeatureDetailView(BoardMixin, FieldSelectionMixin, RetrieveUpdateDestroyAPIView):
     """Get, update, or delete a specific feature"""
     queryset = Feature.objects.all()
     serializer_class = FeatureSerializer
     permission_classes = [permissions.IsAuthenticated]
+    selectable_fields = FeatureSerializer.Meta.fields
+    schema = PerformanceSchema(query_budget={'GET': 3, 'PUT': 14, 'PATCH': 14, 'DELETE': 8}, examples={
+        'GET': {'fields': 'title,total_score,user_vote'},
+        'PUT': {'title': 'Dark mode', 'description': 'A dark theme for the dashboard and emails'},
+        'PATCH': {'description': 'A dark theme for the dashboard and emails'},
+    })
+
+    def get_queryset(self):
+        queryset = Feature.objects.filter(board_id=self.get_board_id())
+        if self.request.method == 'GET':
+            return queryset.for_fields(
+                self.get_selected_fields(),
+                user=self.request.user,
+                description_length=self.get_description_length(),
+            )
+        return queryset
 
     def get_permissions(self):
         """Allow anyone to view, only authors to update/delete"""
@@ -53,6 +174,11 @@ class FeatureDetailView(RetrieveUpdateDestroyAPIView):
             return [permissions.AllowAny()]
         return [permissions.IsAuthenticated()]
 
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            feature = serializer.save()
+            record_feature_event(OutboxEvent.FEATURE_UPDATED, feature)
+
     def perform_destroy(self, instance):
         """Soft delete - only allow authors to delete their own features"""
         if instance.author != self.request.user:
@@ -60,8 +186,7 @@ class FeatureDetailView(RetrieveUpdateDestroyAPIView):
             raise PermissionDenied("You can only delete your own features.")
 
         # Soft delete by changing status instead of actually deleting
-        instance.status = 'deleted'
-        instance.save()
+        instance.soft_delete()
 
     def update(self, request, *args, **kwargs):
         feature = self.get_object()
@@ -78,19 +203,24 @@ class FeatureDetailView(RetrieveUpdateDestroyAPIView):
         return super().destroy(request, *args, **kwargs)
 
 
-class FeatureVoteView(APIView):
+class FeatureVoteView(BoardMixin, APIView):
     """Handle voting on features"""
     permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [VoteRateThrottle, WriteIPRateThrottle]
+    schema = PerformanceSchema(query_budget=8, examples={'POST': {'vote_type': 'upvote'}})
 
-    def post(self, request, pk):
+    # Each vote write commits together with its outbox event
+    @transaction.atomic
+    def post(self, request, pk, board=None):
         """Toggle or change vote on a feature"""
-        feature = get_object_or_404(Feature, pk=pk)
+        feature = get_object_or_404(Feature, pk=pk, board_id=self.get_board_id())
         serializer = VoteActionSerializer(data=request.data)
 
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
         vote_type = serializer.validated_data['vote_type']
+        vote_name = Vote.VOTE_NAMES[vote_type]
         user = request.user
 
         try:
@@ -100,43 +230,57 @@ class FeatureVoteView(APIView):
             if existing_vote.vote_type == vote_type:
                 # Same vote type - remove the vote (toggle off)
                 existing_vote.delete()
+                record_vote_event(feature, user, None, previous=vote_type)
                 return Response({
-                    'message': f'{vote_type.capitalize()} removed',
+                    'message': f'{vote_name.capitalize()} removed',
                     'action': 'removed',
-                    'vote_type': vote_type
+                    'vote_type': vote_name
                 })
             else:
                 # Different vote type - change the vote
+                previous = existing_vote.vote_type
                 existing_vote.vote_type = vote_type
+                existing_vote.ip_address, existing_vote.user_agent = self.client_signals(request)
                 existing_vote.save()
+                record_vote_event(feature, user, vote_type, previous=previous)
                 return Response({
-                    'message': f'Vote changed to {vote_type}',
+                    'message': f'Vote changed to {vote_name}',
                     'action': 'changed',
-                    'vote_type': vote_type
+                    'vote_type': vote_name
                 })
 
         except Vote.DoesNotExist:
             # No existing vote - create new vote
-            Vote.objects.create(user=user, feature=feature, vote_type=vote_type)
+            ip_address, user_agent = self.client_signals(request)
+            Vote.objects.create(user=user, feature=feature, vote_type=vote_type,
+                                ip_address=ip_address, user_agent=user_agent)
+            record_vote_event(feature, user, vote_type)
             return Response({
-                'message': f'{vote_type.capitalize()} added',
+                'message': f'{vote_name.capitalize()} added',
                 'action': 'added',
-                'vote_type': vote_type
+                'vote_type': vote_name
             }, status=status.HTTP_201_CREATED)
 
-    def delete(self, request, pk):
+    @staticmethod
+    def client_signals(request):
+        """Client IP and user agent, kept on the vote for the abuse analyzer"""
+        return client_ip(request), request.META.get('HTTP_USER_AGENT', '')[:200]
+
+    @transaction.atomic
+    def delete(self, request, pk, board=None):
         """Remove user's vote from a feature"""
-        feature = get_object_or_404(Feature, pk=pk)
+        feature = get_object_or_404(Feature, pk=pk, board_id=self.get_board_id())
         user = request.user
 
         try:
             vote = Vote.objects.get(user=user, feature=feature)
-            vote_type = vote.vote_type
+            vote_name = vote.vote_name
             vote.delete()
+            record_vote_event(feature, user, None, previous=vote.vote_type)
             return Response({
-                'message': f'{vote_type.capitalize()} removed',
+                'message': f'{vote_name.capitalize()} removed',
                 'action': 'removed',
-                'vote_type': vote_type
+                'vote_type': vote_name
             })
         except Vote.DoesNotExist:
             return Response({
@@ -144,19 +288,169 @@ class FeatureVoteView(APIView):
             }, status=status.HTTP_400_BAD_REQUEST)
 
 
-class FeatureVotersView(APIView):
-    """List users who voted on a feature"""
+class FeatureVotersView(BoardMixin, FieldSelectionMixin, APIView):
+    """List users who voted on a feature; ?stream=true streams the votes in batches"""
     permission_classes = [permissions.AllowAny]
+    selectable_fields = VoteSerializer.Meta.fields
+    stream_batch_size = 500
+    schema = PerformanceSchema(query_budget=5, examples={'GET': {'fields': 'user,vote_type'}})
 
-    def get(self, request, pk):
-        feature = get_object_or_404(Feature, pk=pk)
+    def get(self, request, pk, board=None):
+        feature = get_object_or_404(Feature.objects.only('id', 'title'), pk=pk, board_id=self.get_board_id())
         votes = Vote.objects.filter(feature=feature)
-        serializer = VoteSerializer(votes, many=True)
+        counts = votes.aggregate(
+            total=Count('id'),
+            upvotes=Count('id', filter=Q(vote_type=Vote.UPVOTE)),
+            downvotes=Count('id', filter=Q(vote_type=Vote.DOWNVOTE)),
+        )
+
+        # ?fields= applies to each vote; only join users when they are shown
+        fields = self.get_selected_fields()
+        wanted = set(fields) if fields is not None else set(self.selectable_fields)
+        columns = {'id'} | (wanted & {'vote_type', 'created_at'})
+        if 'feature' in wanted:
+            columns.add('feature')
+        if 'user' in wanted:
+            votes = votes.select_related('user')
+            columns |= {'user', 'user__id', 'user__username'}
+
+        votes = votes.only(*columns)
+
+        if request.query_params.get('stream') == 'true':
+            header = {
+                'feature_id': str(feature.id),
+                'feature_title': feature.title,
+                'total_votes': counts['total'],
+                'upvotes': counts['upvotes'],
+                'downvotes': counts['downvotes'],
+            }
+            return StreamingHttpResponse(self.stream_votes(header, votes, fields),
+                                         content_type='application/json')
+
+        serializer = VoteSerializer(votes, many=True, context={'fields': fields})
         return Response({
             'feature_id': str(feature.id),
             'feature_title': feature.title,
             'votes': serializer.data,
-            'total_votes': votes.count(),
-            'upvotes': votes.filter(vote_type='upvote').count(),
-            'downvotes': votes.filter(vote_type='downvote').count()
+            'total_votes': counts['total'],
+            'upvotes': counts['upvotes'],
+            'downvotes': counts['downvotes']
         })
+
+    def stream_votes(self, header, votes, fields):
+        """Yield the same JSON document as the buffered response, a batch of votes at a time"""
+        renderer = JSONRenderer()
+        # Open the document with the header keys and leave "votes" as the last, open array
+        yield renderer.render(header)[:-1] + b',"votes":['
+
+        batch, first = [], True
+        for vote in votes.iterator(chunk_size=self.stream_batch_size):
+            batch.append(vote)
+            if len(batch) == self.stream_batch_size:
+                yield (b'' if first else b',') + self._render_batch(renderer, batch, fields)
+                batch, first = [], False
+        if batch:
+            yield (b'' if first else b',') + self._render_batch(renderer, batch, fields)
+        yield b']}'
+
+    @staticmethod
+    def _render_batch(renderer, votes, fields):
+        data = VoteSerializer(votes, many=True, context={'fields': fields}).data
+        return renderer.render(data)[1:-1]
+
+
+class MyVotesView(BoardMixin, ListAPIView):
+    """The current user's votes, newest first, with feature summaries"""
+    serializer_class = UserVoteSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = VoteHistoryPagination
+    schema = PerformanceSchema(query_budget=3, examples={'GET': {'page_size': 50}})
+
+    def get_queryset(self):
+        # One joined query per page: votes plus just the feature columns in the summary
+        return (
+            Vote.objects
+            .filter(user=self.request.user, board_id=self.get_board_id(), feature__status='active')
+            .select_related('feature')
+            .only('id', 'vote_type', 'created_at', 'feature__id', 'feature__title', 'feature__created_at')
+        )
+
+
+class MyVoteIdsView(BoardMixin, APIView):
+    """The current user's votes as {feature_id: vote_type}, for caching user_vote on the client"""
+    permission_classes = [permissions.IsAuthenticated]
+    schema = PerformanceSchema(query_budget=3)
+
+    def get(self, request, board=None):
+        votes = Vote.objects.filter(
+            user=request.user, board_id=self.get_board_id(), feature__status='active'
+        ).values_list('feature_id', 'vote_type')
+        return Response({str(feature_id): Vote.VOTE_NAMES[vote_type] for feature_id, vote_type in votes})
+
+
+class SyncView(BoardMixin, FieldSelectionMixin, APIView):
+    """
+    Changes since a sync token, for clients that keep a local copy of the feed.
+
+    ?since=<token> returns the features created, edited or whose counts
+    changed after the token (plus ids of deleted ones), the caller's changed
+    votes, and a new token. Without a token, or with one too old to serve,
+    the response has reset=true and the client should refetch the feed.
+    ?fields= / ?omit= apply to the returned features.
+    """
+    permission_classes = [permissions.AllowAny]
+    selectable_fields = FeatureListSerializer.Meta.fields
+    # User and board lookups, the log behind and past the token, the features and
+    # the caller's votes. The replay tool swaps in a token for its own data; 'MTow'
+    # is board 1, change 0.
+    schema = PerformanceSchema(
+        query_budget=6,
+        parameters={'since': {'description': 'Sync token from an earlier response; leave out to get one',
+                              'schema': {'type': 'string'}}},
+        examples={'GET': {'since': 'MTow', 'fields': 'title,total_score'}},
+    )
+
+    def get(self, request, board=None):
+        board_id = self.get_board_id()
+        since = None
+        if request.query_params.get('since'):
+            try:
+                token_board_id, since = decode_token(request.query_params['since'])
+            except ValueError:
+                raise ValidationError({'since': 'Invalid sync token'})
+            if token_board_id != board_id:
+                raise ValidationError({'since': 'Sync token belongs to a different board'})
+
+        last_id, feature_ids, feature_ids_by_voter, has_more = changes_since(
+            board_id, since, settings.SYNC_MAX_CHANGES
+        )
+        data = {
+            'token': encode_token(board_id, last_id),
+            'reset': feature_ids == RESET,
+            'has_more': has_more,
+            'features': [],
+            'deleted': [],
+            'votes': {},  # the caller's own votes; always empty for anonymous callers
+        }
+        if feature_ids == RESET:
+            return Response(data)
+
+        fields = self.get_selected_fields()
+        description_length = self.get_description_length()
+        features = Feature.objects.filter(pk__in=feature_ids).for_fields(
+            fields, user=request.user, description_length=description_length
+        )
+        context = {'request': request, 'fields': fields, 'description_length': description_length}
+        data['features'] = FeatureListSerializer(features, many=True, context=context).data
+
+        # Anything logged but no longer active was soft-deleted or archived
+        active_ids = {feature['id'] for feature in data['features']}
+        data['deleted'] = [str(pk) for pk in feature_ids if str(pk) not in active_ids]
+
+        if request.user.is_authenticated:
+            changed = feature_ids_by_voter.get(request.user.pk, set())
+            current = dict(
+                Vote.objects.filter(user=request.user, feature_id__in=changed).values_list('feature_id', 'vote_type')
+            )
+            data['votes'] = {str(pk): Vote.VOTE_NAMES.get(current.get(pk)) for pk in changed}
+        return Response(data)
@@ -0,0 +1,248 @@
+"""
+Webhook delivery for outbox events.
+
+`manage.py dispatch_webhooks` runs dispatch(), which works in two steps.
+
+plan() takes a batch of OutboxEvents and, in one transaction, turns them
+into WebhookDeliveries for the board's webhooks and deletes them. Feature
+create and edit events map one to one. Vote events are never delivered one
+by one. For each feature in the batch they become:
+
+- one feature.threshold delivery for each threshold the upvote count has
+  reached. The dedupe key makes each threshold fire once per webhook and
+  feature.
+- at most one feature.votes summary. The summary waits
+  WEBHOOK_SUMMARY_WINDOW seconds before it is sent, and later batches fold
+  into it until then.
+
+So 10k votes on a feature cost a few threshold deliveries and one summary
+per window, not 10k requests.
+
+deliver() POSTs due deliveries on a bounded thread pool. Only the pool
+threads do HTTP; all database work stays on the calling thread. A failed
+delivery is retried with exponential backoff, up to WEBHOOK_MAX_ATTEMPTS.
+After WEBHOOK_CIRCUIT_THRESHOLD straight failures an endpoint's circuit
+opens. It is then skipped for WEBHOOK_CIRCUIT_COOLDOWN seconds, and the
+next pass sends it a single trial delivery, which closes or re-opens it.
+
+Run one dispatcher at a time: summary folding assumes nobody else is
+sending the pending row it updates.
+"""
+import hashlib
+import hmac
+import json
+import random
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Feature, OutboxEvent, Webhook, WebhookDelivery
+
+# Client errors that are still worth retrying
+RETRYABLE_STATUSES = {408, 425, 429}
+
+
+def dispatch(batch_size=None, concurrency=None):
+    """Plan one batch of outbox events, then send what is due; returns (events, sent, failed)"""
+    events = plan(batch_size)
+    sent, failed = deliver(concurrency)
+    return events, sent, failed
+
+
+def plan(batch_size=None):
+    """Turn up to `batch_size` outbox events into deliveries; returns the number of events consumed"""
+    batch_size = batch_size or settings.WEBHOOK_BATCH_SIZE
+    with transaction.atomic():
+        events = list(OutboxEvent.objects.select_for_update(skip_locked=True).order_by('id')[:batch_size])
+        if not events:
+            return 0
+
+        webhooks_by_board = {}
+        for webhook in Webhook.objects.filter(active=True, board_id__in={event.board_id for event in events}):
+            webhooks_by_board.setdefault(webhook.board_id, []).append(webhook)
+
+        if webhooks_by_board:
+            deliveries = _feature_deliveries(events, webhooks_by_board)
+            deliveries += _vote_deliveries(events, webhooks_by_board)
+            WebhookDelivery.objects.bulk_create(deliveries, ignore_conflicts=True)
+        OutboxEvent.objects.filter(pk__in=[event.pk for event in events]).delete()
+    return len(events)
+
+
+def _feature_deliveries(events, webhooks_by_board):
+    deliveries = []
+    for event in events:
+        if event.event_type == OutboxEvent.VOTE_CHANGED:
+            continue
+        payload = {
+            'event': event.event_type,
+            'feature': {'id': str(event.feature_id), 'board_id': event.board_id, **event.payload},
+            'occurred_at': event.created_at.isoformat(),
+        }
+        for webhook in webhooks_by_board.get(event.board_id, []):
+            if event.event_type in webhook.events:
+                deliveries.append(WebhookDelivery(webhook=webhook, event_type=event.event_type,
+                                                  feature_id=event.feature_id, payload=payload))
+    return deliveries
+
+
+def _vote_deliveries(events, webhooks_by_board):
+    votes_by_feature = {}
+    for event in events:
+        if event.event_type == OutboxEvent.VOTE_CHANGED:
+            votes_by_feature[event.feature_id] = votes_by_feature.get(event.feature_id, 0) + 1
+    if not votes_by_feature:
+        return []
+
+    features = Feature.objects.filter(pk__in=votes_by_feature).with_vote_counts().only('id', 'title', 'board_id')
+    pending_summaries = {
+        (delivery.webhook_id, delivery.feature_id): delivery
+        for delivery in WebhookDelivery.objects.filter(
+            status='pending', event_type='feature.votes', feature_id__in=votes_by_feature,
+        )
+    }
+
+    now = timezone.now()
+    deliveries = []
+    folded = []
+    for feature in features:
+        counts = {
+            'upvote_count': feature.upvote_count,
+            'downvote_count': feature.downvote_count,
+            'total_score': feature.total_score,
+        }
+        summary = {'id': str(feature.pk), 'board_id': feature.board_id, 'title': feature.title}
+        for webhook in webhooks_by_board.get(feature.board_id, []):
+            if 'feature.threshold' in webhook.events:
+                for threshold in webhook.thresholds:
+                    if feature.upvote_count >= threshold:
+                        deliveries.append(WebhookDelivery(
+                            webhook=webhook, event_type='feature.threshold', feature_id=feature.pk,
+                            dedupe_key=f'threshold:{feature.pk}:{threshold}',
+                            payload={'event': 'feature.threshold', 'feature': summary, 'threshold': threshold,
+                                     'occurred_at': now.isoformat(), **counts},
+                        ))
+
+            if 'feature.votes' in webhook.events:
+                pending = pending_summaries.get((webhook.pk, feature.pk))
+                if pending is not None:
+                    pending.payload.update(counts, votes=pending.payload['votes'] + votes_by_feature[feature.pk],
+                                           occurred_at=now.isoformat())
+                    folded.append(pending)
+                else:
+                    deliveries.append(WebhookDelivery(
+                        webhook=webhook, event_type='feature.votes', feature_id=feature.pk,
+                        next_attempt_at=now + timedelta(seconds=settings.WEBHOOK_SUMMARY_WINDOW),
+                        payload={'event': 'feature.votes', 'feature': summary,
+                                 'votes': votes_by_feature[feature.pk], 'occurred_at': now.isoformat(), **counts},
+                    ))
+
+    WebhookDelivery.objects.bulk_update(folded, ['payload'])
+    return deliveries
+
+
+def deliver(concurrency=None, limit=None):
+    """POST due deliveries, at most `concurrency` at once; returns (sent, failed attempts)"""
+    concurrency = concurrency or settings.WEBHOOK_CONCURRENCY
+    limit = limit or settings.WEBHOOK_BATCH_SIZE
+    now = timezone.now()
+    due = (
+        WebhookDelivery.objects
+        .filter(status='pending', next_attempt_at__lte=now, webhook__active=True)
+        .exclude(webhook__circuit_open_until__gt=now)
+        .select_related('webhook')
+        .order_by('next_attempt_at')[:limit]
+    )
+
+    batch = []
+    on_trial = set()
+    for delivery in due:
+        webhook = delivery.webhook
+        if webhook.consecutive_failures >= settings.WEBHOOK_CIRCUIT_THRESHOLD:
+            # Cooldown is over: one trial delivery decides whether the circuit closes
+            if webhook.pk in on_trial:
+                continue
+            on_trial.add(webhook.pk)
+        batch.append(delivery)
+    if not batch:
+        return 0, 0
+
+    timeout = settings.WEBHOOK_TIMEOUT
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='webhook') as pool:
+        results = list(pool.map(lambda delivery: send(delivery, timeout), batch))
+
+    now = timezone.now()
+    webhooks = {}
+    sent = failed = 0
+    for delivery, (status, error) in zip(batch, results):
+        webhook = webhooks.setdefault(delivery.webhook_id, delivery.webhook)
+        delivery.attempts += 1
+        if status is not None and 200 <= status < 300:
+            delivery.status, delivery.delivered_at, delivery.last_error = 'delivered', now, ''
+            webhook.consecutive_failures = 0
+            sent += 1
+            continue
+
+        failed += 1
+        delivery.last_error = error
+        if status is not None and status < 500 and status not in RETRYABLE_STATUSES:
+            # The endpoint answered, it just won't take this one; retrying won't help
+            delivery.status = 'failed'
+            webhook.consecutive_failures = 0
+            continue
+        webhook.consecutive_failures += 1
+        if delivery.attempts >= settings.WEBHOOK_MAX_ATTEMPTS:
+            delivery.status = 'failed'
+        else:
+            delivery.next_attempt_at = now + timedelta(seconds=backoff(delivery.attempts))
+
+    for webhook in webhooks.values():
+        if webhook.consecutive_failures >= settings.WEBHOOK_CIRCUIT_THRESHOLD:
+            webhook.circuit_open_until = now + timedelta(seconds=settings.WEBHOOK_CIRCUIT_COOLDOWN)
+        else:
+            webhook.circuit_open_until = None
+
+    with transaction.atomic():
+        WebhookDelivery.objects.bulk_update(
+            batch, ['status', 'attempts', 'next_attempt_at', 'last_error', 'delivered_at']
+        )
+        Webhook.objects.bulk_update(webhooks.values(), ['consecutive_failures', 'circuit_open_until'])
+    return sent, failed
+
+
+def backoff(attempts):
+    """Seconds before retry number `attempts`: doubling from WEBHOOK_BACKOFF_BASE, capped, with jitter"""
+    delay = min(settings.WEBHOOK_BACKOFF_BASE * 2 ** (attempts - 1), settings.WEBHOOK_BACKOFF_MAX)
+    # Jitter spreads retries out so endpoints recovering from an outage aren't hit all at once
+    return delay * random.uniform(0.5, 1.0)
+
+
+def send(delivery, timeout):
+    """POST one delivery; returns (HTTP status or None, error message)"""
+    body = json.dumps(delivery.payload).encode()
+    headers = {
+        'Content-Type': 'application/json',
+        'User-Agent': 'feature-voting-webhooks',
+        'X-Webhook-Event': delivery.event_type,
+        'X-Webhook-Delivery': str(delivery.pk),
+    }
+    if delivery.webhook.secret:
+        headers['X-Webhook-Signature'] = 'sha256=' + sign(delivery.webhook.secret, body)
+
+    request = urllib.request.Request(delivery.webhook.url, data=body, headers=headers, method='POST')
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.status, ''
+    except urllib.error.HTTPError as exc:
+        return exc.code, f'HTTP {exc.code}'
+    except (urllib.error.URLError, OSError) as exc:
+        return None, str(getattr(exc, 'reason', exc))
+
+
+def sign(secret, body):
+    return hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
@@ -0,0 +1,18 @@
+"""
+gunicorn settings for API workers: `gunicorn -c gunicorn.conf.py`
+
+The app is imported once in the master (preload_app) and workers fork from
+it, so a worker scaled up during a spike starts already warm. config.startup
+keeps that safe: the master's DB connections are closed before each fork
+and every worker builds its own auth hashing pool.
+"""
+import os
+
+from decouple import config
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings_api')
+
+wsgi_app = 'config.wsgi:application'
+bind = config('GUNICORN_BIND', default='0.0.0.0:8000')
+workers = config('GUNICORN_WORKERS', default=2, cast=int)
+preload_app = config('GUNICORN_PRELOAD', default=True, cast=bool)
@@ -0,0 +1,139 @@
+"""
+Password hashing off the request thread.
+
+Hashing is deliberately expensive, so during a login storm it can pin every
+worker CPU and starve the feature and vote endpoints. All hashing for login
+and registration goes through a small bounded pool instead: at most
+AUTH_HASHING_WORKERS hashes run at once, at most AUTH_HASHING_QUEUE_DEPTH
+wait behind them, and anything beyond that is rejected immediately with a
+503 rather than queuing up behind the storm.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import check_password, get_hasher, identify_hasher, make_password
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class AuthenticationBusy(APIException):
+    """Raised when the hashing pool is saturated; rendered as 503 with Retry-After"""
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Authentication is temporarily overloaded, please retry shortly.'
+    default_code = 'authentication_busy'
+
+    def __init__(self, detail=None, code=None, wait=1):
+        super().__init__(detail, code)
+        # DRF's exception handler turns `wait` into a Retry-After header
+        self.wait = wait
+
+
+class HashingPool:
+    """Thread pool that refuses work instead of growing an unbounded backlog"""
+
+    def __init__(self, max_workers, queue_depth, timeout=None):
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix='auth-hashing')
+        self._slots = threading.BoundedSemaphore(max_workers + queue_depth)
+
+    def run(self, fn, *args):
+        """Run fn(*args) on the pool and return its result, or raise AuthenticationBusy"""
+        if not self._slots.acquire(blocking=False):
+            raise AuthenticationBusy()
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            raise AuthenticationBusy()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_hashing_pool():
+    """Return the process-wide hashing pool, creating it from settings on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = HashingPool(
+                    max_workers=settings.AUTH_HASHING_WORKERS,
+                    queue_depth=settings.AUTH_HASHING_QUEUE_DEPTH,
+                    timeout=settings.AUTH_HASHING_TIMEOUT,
+                )
+    return _pool
+
+
+def reset_hashing_pool():
+    """Drop the current pool so the next call rebuilds it (used after settings changes)"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+        _pool = None
+
+
+def forget_hashing_pool():
+    """
+    Drop the pool without shutting it down, for a freshly forked worker: the
+    pool's threads only exist in the parent, and its locks may have been
+    copied mid-use.
+    """
+    global _pool, _pool_lock
+    _pool = None
+    _pool_lock = threading.Lock()
+
+
+def _check(raw_password, encoded):
+    """Verify a password; report whether the stored hash should be upgraded"""
+    if not check_password(raw_password, encoded):
+        return False, False
+    hasher = identify_hasher(encoded)
+    preferred = get_hasher()
+    return True, hasher.algorithm != preferred.algorithm or preferred.must_update(encoded)
+
+
+def hash_password(raw_password):
+    """make_password() on the hashing pool"""
+    return get_hashing_pool().run(make_password, raw_password)
+
+
+def authenticate_user(username, password):
+    """
+    Equivalent of ModelBackend.authenticate() with the hashing on the pool.
+
+    The user lookup and any rehash write stay on the request thread so the
+    pool never touches the database. When the stored hash was made with an
+    older hasher or cost, it is transparently re-encoded with the current one.
+    """
+    UserModel = get_user_model()
+    pool = get_hashing_pool()
+
+    try:
+        user = UserModel._default_manager.get_by_natural_key(username)
+    except UserModel.DoesNotExist:
+        # Run the default hasher anyway to keep response timing uniform
+        pool.run(make_password, password)
+        return None
+
+    is_correct, must_update = pool.run(_check, password, user.password)
+    if not is_correct or not user.is_active:
+        return None
+
+    if must_update:
+        user.password = pool.run(make_password, password)
+        user.save(update_fields=['password'])
+    return user
@@ -1,7 +1,7 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
-from django.contrib.auth import authenticate
 from rest_framework_simplejwt.tokens import RefreshToken
+from .hashing import authenticate_user, hash_password
 
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
@@ -19,7 +19,14 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         validated_data.pop('password_confirm')
-        user = User.objects.create_user(**validated_data)
+        password = validated_data.pop('password')
+        user = User(
+            username=User.normalize_username(validated_data['username']),
+            email=User.objects.normalize_email(validated_data.get('email', '')),
+        )
+        # Hash on the bounded pool rather than inside create_user()
+        user.password = hash_password(password)
+        user.save()
         return user
 
 
@@ -32,7 +39,7 @@ class UserLoginSerializer(serializers.Serializer):
         password = attrs.get('password')
 
         if username and password:
-            user = authenticate(username=username, password=password)
+            user = authenticate_user(username, password)
             if not user:
                 raise serializers.ValidationError('Invalid credentials')
             if not user.is_active:
@@ -1,10 +1,35 @@
-from django.test import TestCase
+import os
+import threading
+from unittest import mock, skipUnless
+
+from django.test import TestCase, override_settings
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import User
 from rest_framework.test import APITestCase
 from rest_framework import status
+from config.startup import install_fork_hooks
+from . import hashing
+from .hashing import AuthenticationBusy, HashingPool
+from .throttling import MemoryBucketStore, _memory_store
+
+try:
+    import argon2
+except ImportError:
+    argon2 = None
+
+FAST_PBKDF2 = 1000
+# The test settings only use MD5; rehash tests need the real hasher list
+PRODUCTION_HASHERS = [
+    'users.hashers.ConfigurablePBKDF2PasswordHasher',
+    'users.hashers.ConfigurableArgon2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+]
 
 
 class UserAuthenticationTest(APITestCase):
+    def setUp(self):
+        _memory_store.clear()
+
     def test_user_registration_success(self):
         data = {
             'username': 'testuser',
@@ -90,3 +115,132 @@ class UserAuthenticationTest(APITestCase):
         self.assertIn('refresh', tokens)
         self.assertIsInstance(tokens['access'], str)
         self.assertIsInstance(tokens['refresh'], str)
+
+
+@override_settings(PASSWORD_HASHERS=PRODUCTION_HASHERS, PASSWORD_PBKDF2_ITERATIONS=FAST_PBKDF2)
+class PasswordRehashTest(APITestCase):
+    def setUp(self):
+        _memory_store.clear()
+
+    def login(self, username, password):
+        return self.client.post('/api/auth/login/', {'username': username, 'password': password})
+
+    def test_legacy_hasher_upgraded_on_login(self):
+        User.objects.create(username='legacy', password=make_password('testpass123', hasher='pbkdf2_sha1'))
+
+        response = self.login('legacy', 'testpass123')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(User.objects.get(username='legacy').password.startswith('pbkdf2_sha256$1000$'))
+
+    def test_changed_iterations_upgraded_on_login(self):
+        with self.settings(PASSWORD_PBKDF2_ITERATIONS=500):
+            User.objects.create(username='old', password=make_password('testpass123'))
+
+        self.login('old', 'testpass123')
+        self.assertTrue(User.objects.get(username='old').password.startswith('pbkdf2_sha256$1000$'))
+
+    def test_failed_login_does_not_rehash(self):
+        encoded = make_password('testpass123', hasher='pbkdf2_sha1')
+        User.objects.create(username='legacy', password=encoded)
+
+        response = self.login('legacy', 'wrongpass')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(User.objects.get(username='legacy').password, encoded)
+
+    @skipUnless(argon2, 'argon2-cffi is not installed')
+    def test_argon2_preferred_hasher(self):
+        User.objects.create(username='legacy', password=make_password('testpass123'))
+
+        with self.settings(PASSWORD_HASHERS=[
+            'users.hashers.ConfigurableArgon2PasswordHasher',
+            'users.hashers.ConfigurablePBKDF2PasswordHasher',
+        ], PASSWORD_ARGON2_MEMORY_COST=1024, PASSWORD_ARGON2_PARALLELISM=1):
+            response = self.login('legacy', 'testpass123')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(User.objects.get(username='legacy').password.startswith('argon2$'))
+
+
+class HashingPoolTest(TestCase):
+    def test_rejects_work_beyond_queue_depth(self):
+        pool = HashingPool(max_workers=1, queue_depth=0)
+        release = threading.Event()
+        started = threading.Event()
+
+        def block():
+            started.set()
+            release.wait(5)
+            return 'done'
+
+        worker = threading.Thread(target=pool.run, args=(block,))
+        worker.start()
+        started.wait(5)
+        try:
+            with self.assertRaises(AuthenticationBusy):
+                pool.run(lambda: None)
+        finally:
+            release.set()
+            worker.join()
+        self.assertEqual(pool.run(lambda: 'free again'), 'free again')
+        pool.shutdown()
+
+    @skipUnless(hasattr(os, 'fork'), 'needs os.fork')
+    def test_forked_worker_builds_its_own_pool(self):
+        install_fork_hooks()
+        parent_pool = hashing.get_hashing_pool()
+        pid = os.fork()
+        if pid == 0:
+            # The child's copy of the parent pool has no threads behind it
+            fresh = hashing._pool is None and hashing.get_hashing_pool() is not parent_pool
+            os._exit(0 if fresh and hashing.hash_password('x') else 1)
+        _, exit_status = os.waitpid(pid, 0)
+        self.assertEqual(os.waitstatus_to_exitcode(exit_status), 0)
+        self.assertIs(hashing.get_hashing_pool(), parent_pool)
+
+    def test_login_returns_503_when_saturated(self):
+        busy_pool = mock.Mock()
+        busy_pool.run.side_effect = AuthenticationBusy(wait=2)
+
+        with mock.patch('users.hashing.get_hashing_pool', return_value=busy_pool):
+            response = self.client.post('/api/auth/login/', {'username': 'someone', 'password': 'x'})
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response['Retry-After'], '2')
+
+
+class AuthRateLimitTest(APITestCase):
+    def setUp(self):
+        _memory_store.clear()
+
+    def test_token_bucket_refills_over_time(self):
+        store = MemoryBucketStore()
+        self.assertTrue(store.consume('k', 2, 1.0, now=0)[0])
+        self.assertTrue(store.consume('k', 2, 1.0, now=0)[0])
+        self.assertFalse(store.consume('k', 2, 1.0, now=0)[0])
+        self.assertTrue(store.consume('k', 2, 1.0, now=1)[0])
+
+    def test_refilled_buckets_are_swept(self):
+        store = MemoryBucketStore()
+        for n in range(100):
+            store.consume(f'ip{n}', 5, 5 / 60, now=0)
+        store.consume('busy', 1, 1 / 3600, now=0)
+        self.assertEqual(len(store), 101)
+
+        # Twelve seconds refill one token, so the others are full by the next sweep
+        store.consume('late', 5, 5 / 60, now=store.sweep_interval)
+        self.assertEqual(len(store), 2)
+        self.assertFalse(store.consume('busy', 1, 1 / 3600, now=store.sweep_interval)[0])
+
+    @override_settings(REST_FRAMEWORK={'DEFAULT_THROTTLE_RATES': {'login_username': '2/min'}})
+    def test_login_throttled_per_username(self):
+        for _ in range(2):
+            response = self.client.post('/api/auth/login/', {'username': 'Target', 'password': 'guess'})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post('/api/auth/login/', {'username': 'target', 'password': 'guess'})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', response)
+
+        # Other usernames are unaffected
+        response = self.client.post('/api/auth/login/', {'username': 'other', 'password': 'guess'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,142 @@
+"""
+Token-bucket rate limiting for the auth endpoints.
+
+Rates use DRF's "<count>/<period>" format and live in
+REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'] under each throttle's scope. Bucket
+state is kept in process memory by default; set AUTH_RATE_LIMIT_STORE to
+'cache' to share it across workers through the default Django cache.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """Parse '10/min' into (10, 60)"""
+    num, period = rate.split('/')
+    return int(num), PERIODS[period[0]]
+
+
+class MemoryBucketStore:
+    """
+    In-process bucket state; exact, but per worker. A bucket that has refilled
+    to capacity is the same as no bucket, so a sweep every `sweep_interval`
+    seconds drops those and memory stays bounded by the keys seen recently.
+    """
+    sweep_interval = 60
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._next_sweep = None
+
+    def consume(self, key, capacity, refill_per_second, now):
+        with self._lock:
+            if self._next_sweep is None or now >= self._next_sweep:
+                self._sweep(now)
+            tokens, updated, _ = self._buckets.get(key, (capacity, now, now))
+            tokens = min(capacity, tokens + (now - updated) * refill_per_second)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now, now + (capacity - tokens) / refill_per_second)
+            return allowed, tokens
+
+    def _sweep(self, now):
+        self._buckets = {key: bucket for key, bucket in self._buckets.items() if bucket[2] > now}
+        self._next_sweep = now + self.sweep_interval
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class CacheBucketStore:
+    """Bucket state in the Django cache; shared across workers, best-effort under races"""
+
+    def __init__(self, prefix='auth-bucket'):
+        self.prefix = prefix
+
+    def consume(self, key, capacity, refill_per_second, now):
+        cache_key = f'{self.prefix}:{key}'
+        tokens, updated = cache.get(cache_key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * refill_per_second)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        # Expire once the bucket would have refilled completely anyway
+        cache.set(cache_key, (tokens, now), timeout=int(capacity / refill_per_second) + 1)
+        return allowed, tokens
+
+
+_memory_store = MemoryBucketStore()
+
+
+def get_bucket_store():
+    if settings.AUTH_RATE_LIMIT_STORE == 'cache':
+        return CacheBucketStore()
+    return _memory_store
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Allow bursts up to the rate's count, refilling evenly over its period"""
+    scope = None
+    timer = time.time
+
+    def get_cache_key(self, request, view):
+        raise NotImplementedError('.get_cache_key() must be overridden')
+
+    def allow_request(self, request, view):
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+        if rate is None:
+            return True
+
+        key = self.get_cache_key(request, view)
+        if key is None:
+            return True
+
+        capacity, duration = parse_rate(rate)
+        self.refill_per_second = capacity / duration
+        allowed, self.tokens = get_bucket_store().consume(
+            f'{self.scope}:{key}', capacity, self.refill_per_second, self.timer()
+        )
+        return allowed
+
+    def wait(self):
+        return (1 - self.tokens) / self.refill_per_second
+
+
+class LoginRateThrottle(TokenBucketThrottle):
+    """Limit login attempts per client IP"""
+    scope = 'login_ip'
+
+    def get_cache_key(self, request, view):
+        return self.get_ident(request)
+
+
+class LoginUsernameRateThrottle(TokenBucketThrottle):
+    """Limit login attempts per target username, whatever IP they come from"""
+    scope = 'login_username'
+
+    def get_cache_key(self, request, view):
+        username = request.data.get('username') if hasattr(request.data, 'get') else None
+        if not username:
+            return None
+        return str(username).lower()
+
+
+class RegisterRateThrottle(TokenBucketThrottle):
+    """Limit account creation per client IP"""
+    scope = 'register_ip'
+
+    def get_cache_key(self, request, view):
+        return self.get_ident(request)
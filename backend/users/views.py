@@ -3,11 +3,18 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import AllowAny
 from rest_framework_simplejwt.tokens import RefreshToken
+from config.schema import EXAMPLE_PASSWORD, EXAMPLE_USERNAME, PerformanceSchema
 from .serializers import UserRegistrationSerializer, UserLoginSerializer, UserSerializer
+from .throttling import LoginRateThrottle, LoginUsernameRateThrottle, RegisterRateThrottle
 
 
 class RegisterView(APIView):
     permission_classes = [AllowAny]
+    throttle_classes = [RegisterRateThrottle]
+    schema = PerformanceSchema(query_budget=3, examples={'POST': {
+        'username': 'new-example', 'email': 'new-example@example.com',
+        'password': 'new-example-password', 'password_confirm': 'new-example-password',
+    }})
 
     def post(self, request):
         serializer = UserRegistrationSerializer(data=request.data)
@@ -30,6 +37,10 @@ class RegisterView(APIView):
 
 class LoginView(APIView):
     permission_classes = [AllowAny]
+    throttle_classes = [LoginRateThrottle, LoginUsernameRateThrottle]
+    schema = PerformanceSchema(query_budget=2, examples={
+        'POST': {'username': EXAMPLE_USERNAME, 'password': EXAMPLE_PASSWORD},
+    })
 
     def post(self, request):
         serializer = UserLoginSerializer(data=request.data)